@@ -9,9 +9,19 @@ from flask import (
 from flask_cors import CORS
 import json
 import io
+import math
 import base64
 from simulation.model import BattleOfZborowModel
+from simulation.map_assets import load_map_assets
 from simulation.web_renderer import WebRenderer
+from simulation.heatmap_codec import encode_heatmap, decode_heatmap
+from simulation.map_bundle import GID_MASK, load_map_bundle
+from simulation.units import UNIT_TYPES, WEATHERS
+from simulation.scenarios import get_scenarios as scenario_catalog
+from simulation.batch import JobLimitError, OutcomeJobs
+from simulation.outcome_cache import OutcomeCache
+from simulation.sessions import SessionLimitError, SessionRegistry
+from simulation.ticker import clamp_tick_rate
 import threading
 import time
 import os
@@ -20,13 +30,40 @@ import uuid
 app = Flask(__name__)
 CORS(app)
 
-simulation = None
-simulation_lock = threading.Lock()
-simulation_running = False
-current_scenario_id = None
-
 MAP_PATH = "assets/map/map.tmx"
 RESULTS_FILE = "battle_results.json"
+OUTCOME_CACHE_FILE = "outcome_cache.sqlite"
+OUTCOME_WORKERS = int(os.environ.get("OUTCOME_WORKERS", 2))
+MAX_OUTCOME_STEPS = 5000
+SESSION_COOKIE = "battle_session"
+TICK_RATE = clamp_tick_rate(float(os.environ.get("SIMULATION_TICK_RATE", 5.0)))
+
+sessions = SessionRegistry(
+    max_sessions=int(os.environ.get("MAX_SIMULATIONS", 16)),
+    idle_timeout=int(os.environ.get("SIMULATION_IDLE_TIMEOUT", 900)),
+)
+
+outcome_jobs = None
+outcome_jobs_lock = threading.Lock()
+
+
+def get_outcome_jobs():
+    global outcome_jobs
+
+    with outcome_jobs_lock:
+        if outcome_jobs is None:
+            outcome_jobs = OutcomeJobs(
+                OutcomeCache(OUTCOME_CACHE_FILE), workers=OUTCOME_WORKERS
+            )
+        return outcome_jobs
+
+
+def current_session():
+    return sessions.get(request.cookies.get(SESSION_COOKIE))
+
+
+def no_session_response():
+    return jsonify({"error": "Symulacja nie została rozpoczęta"}), 400
 
 
 @app.route("/")
@@ -73,6 +110,7 @@ def get_single_battle_result(result_id):
             result = next((item for item in data if item.get("id") == result_id), None)
 
             if result:
+                result["heatmap"] = decode_heatmap(result.get("heatmap"))
                 return jsonify({"ok": True, "data": result})
             else:
                 return jsonify({"ok": False, "error": "Result not found"}), 404
@@ -94,37 +132,18 @@ def clear_battle_results():
 
 @app.route("/api/unit-types", methods=["GET"])
 def get_unit_types():
-    model = BattleOfZborowModel(MAP_PATH, {})
-
-    cossack_units_list = [
-        "Jazda Tatarska",
-        "Piechota Kozacka",
-        "Czern",
-        "Jazda Kozacka",
-        "Artyleria Kozacka",
-    ]
-
     unit_types = {}
-    for unit_name, params in model.unit_params.items():
-        if (
-            unit_name in cossack_units_list
-            or "Kozacka" in unit_name
-            or "Tatarska" in unit_name
-        ):
-            faction = "Kozacy/Tatarzy"
-        else:
-            faction = "Armia Koronna"
-
+    for unit_name, unit in UNIT_TYPES["clear"].items():
         unit_types[unit_name] = {
-            "faction": faction,
-            "hp": params["hp"],
-            "morale": params["morale"],
-            "discipline": params.get("discipline", 50),
-            "range": params["range"],
-            "damage": params.get("melee_damage", 0),
-            "speed": params["speed"],
-            "description": params["description"],
-            "sprite_path": params["sprite_path"],
+            "faction": unit.faction,
+            "hp": unit.hp,
+            "morale": unit.morale,
+            "discipline": unit.discipline,
+            "range": unit.range,
+            "damage": unit.melee_damage,
+            "speed": unit.speed,
+            "description": unit.description,
+            "sprite_path": unit.sprite_path,
         }
 
     return jsonify(unit_types)
@@ -132,235 +151,31 @@ def get_unit_types():
 
 @app.route("/api/scenarios", methods=["GET"])
 def get_scenarios():
+    return jsonify(scenario_catalog())
 
-    all_units = [
-        "Husaria",
-        "Pancerni",
-        "Rajtaria",
-        "Dragonia",
-        "Piechota Niemiecka",
-        "Pospolite Ruszenie",
-        "Czeladz Obozowa",
-        "Artyleria Koronna",
-        "Jazda Tatarska",
-        "Piechota Kozacka",
-        "Czern",
-        "Jazda Kozacka",
-        "Artyleria Kozacka",
-    ]
-
-    scenarios = {
-        "scenario_1": {
-            "id": "scenario_1",
-            "name": "Dzień 1: Chaos na Przeprawie (15 VIII)",
-            "description": "Atak na przeprawę. Wojska koronne (niebieskie) utknęły na mostach i lewym brzegu. Tatarzy atakują z lasów po lewej.",
-            "units": {
-                "Pospolite Ruszenie": 10,
-                "Czeladz Obozowa": 6,
-                "Pancerni": 4,
-                "Husaria": 2,
-                "Jazda Tatarska": 16,
-                "Jazda Kozacka": 4,
-                "_deployment": {
-                    "Czeladz Obozowa": {"x": [35, 55], "y": [30, 70]},
-                    "Pospolite Ruszenie": {
-                        "x": [25, 45],
-                        "y": [20, 80],
-                    },
-                    "Pancerni": {
-                        "x": [45, 60],
-                        "y": [10, 90],
-                    },
-                    "Husaria": {"x": [50, 65], "y": [40, 60]},
-                    "Jazda Tatarska": {"x": [2, 20], "y": [10, 90]},
-                    "Jazda Kozacka": {"x": [2, 15], "y": [40, 60]},
-                },
-            },
-        },
-        "scenario_2": {
-            "id": "scenario_2",
-            "name": "Dzień 2: Obrona Wałów (16 VIII)",
-            "description": "Główna faza bitwy. Polacy obsadzają fortyfikacje po prawej stronie mapy. Kozacy szturmują przez przedpole.",
-            "units": {
-                "Piechota Niemiecka": 10,
-                "Dragonia": 6,
-                "Artyleria Koronna": 3,
-                "Husaria": 3,
-                "Piechota Kozacka": 18,
-                "Czern": 12,
-                "Artyleria Kozacka": 3,
-                "Jazda Tatarska": 5,
-                "_deployment": {
-                    "Piechota Niemiecka": {
-                        "x": [110, 125],
-                        "y": [15, 85],
-                    },
-                    "Artyleria Koronna": {"x": [115, 130], "y": [20, 80]},
-                    "Dragonia": {"x": [120, 140], "y": [10, 90]},
-                    "Husaria": {"x": [130, 150], "y": [40, 60]},
-                    "Piechota Kozacka": {"x": [60, 95], "y": [10, 90]},
-                    "Czern": {"x": [50, 80], "y": [20, 80]},
-                    "Artyleria Kozacka": {"x": [40, 60], "y": [30, 70]},
-                    "Jazda Tatarska": {
-                        "x": [30, 50],
-                        "y": [10, 90],
-                    },
-                },
-            },
-        },
-        "scenario_3": {
-            "id": "scenario_3",
-            "name": "Kryzys: Kontratak Czeladzi",
-            "description": "Krytyczny moment. Wróg wdarł się do miasta (prawa strona). Czeladź broni centrum obozu.",
-            "units": {
-                "Czeladz Obozowa": 20,
-                "Dragonia": 4,
-                "Pospolite Ruszenie": 2,
-                "Piechota Kozacka": 12,
-                "Jazda Kozacka": 4,
-                "_deployment": {
-                    "Czeladz Obozowa": {"x": [135, 155], "y": [30, 70]},
-                    "Dragonia": {"x": [130, 145], "y": [20, 80]},
-                    "Piechota Kozacka": {"x": [110, 130], "y": [15, 85]},
-                    "Jazda Kozacka": {"x": [100, 120], "y": [40, 60]},
-                },
-            },
-        },
-        "scenario_4": {
-            "id": "scenario_4",
-            "name": "Hipotetyczne: Bitwa na Przedpolu",
-            "description": "Jan Kazimierz wyprowadza wojska przed wały (na środek mapy), by wydać bitwę w polu.",
-            "units": {
-                "Piechota Niemiecka": 8,
-                "Husaria": 6,
-                "Pancerni": 8,
-                "Dragonia": 4,
-                "Piechota Kozacka": 12,
-                "Jazda Tatarska": 12,
-                "Jazda Kozacka": 8,
-                "_deployment": {
-                    "Piechota Niemiecka": {"x": [90, 105], "y": [20, 80]},
-                    "Husaria": {"x": [100, 110], "y": [30, 70]},
-                    "Pancerni": {"x": [90, 105], "y": [10, 90]},
-                    "Piechota Kozacka": {"x": [50, 70], "y": [20, 80]},
-                    "Jazda Kozacka": {"x": [40, 60], "y": [10, 90]},
-                    "Jazda Tatarska": {"x": [30, 50], "y": [5, 95]},
-                },
-            },
-        },
-        "scenario_5": {
-            "id": "scenario_5",
-            "name": "Potyczka nad Rzeką (Zwiad)",
-            "description": "Walka podjazdowa o kontrolę nad mostami na rzece Strypie.",
-            "units": {
-                "Pancerni": 5,
-                "Dragonia": 2,
-                "Jazda Tatarska": 5,
-                "Jazda Kozacka": 3,
-                "_deployment": {
-                    "Pancerni": {"x": [50, 60], "y": [30, 70]},
-                    "Dragonia": {"x": [55, 65], "y": [40, 60]},
-                    "Jazda Tatarska": {"x": [20, 35], "y": [20, 80]},
-                    "Jazda Kozacka": {"x": [25, 40], "y": [40, 60]},
-                },
-            },
-        },
-        "scenario_6": {
-            "id": "scenario_6",
-            "name": "Szarża Husarii z Obozu",
-            "description": "Wycieczka Husarii zza wałów przeciwko oblegającym wojskom.",
-            "units": {
-                "Husaria": 10,
-                "Pancerni": 4,
-                "Piechota Kozacka": 10,
-                "Czern": 15,
-                "Jazda Tatarska": 5,
-                "_deployment": {
-                    "Husaria": {"x": [110, 125], "y": [10, 90]},
-                    "Pancerni": {"x": [120, 130], "y": [20, 80]},
-                    "Czern": {"x": [70, 90], "y": [10, 90]},
-                    "Piechota Kozacka": {"x": [60, 80], "y": [20, 80]},
-                    "Jazda Tatarska": {"x": [40, 60], "y": [5, 95]},
-                },
-            },
-        },
-        "scenario_7": {
-            "id": "scenario_7",
-            "name": "Rzeczywisty: Pełne Oblężenie",
-            "description": "Historyczna dysproporcja sił (1:4). Polacy zamknięci w fortyfikacjach (prawo), wróg zalewa całą mapę.",
-            "units": {
-                "Piechota Niemiecka": 6,
-                "Dragonia": 4,
-                "Husaria": 2,
-                "Pospolite Ruszenie": 6,
-                "Artyleria Koronna": 2,
-                "Piechota Kozacka": 25,
-                "Czern": 20,
-                "Jazda Tatarska": 15,
-                "Artyleria Kozacka": 4,
-                "_deployment": {
-                    "Piechota Niemiecka": {"x": [115, 130], "y": [15, 85]},
-                    "Artyleria Koronna": {"x": [120, 135], "y": [25, 75]},
-                    "Dragonia": {"x": [125, 145], "y": [10, 90]},
-                    "Husaria": {"x": [140, 155], "y": [40, 60]},
-                    "Pospolite Ruszenie": {"x": [135, 155], "y": [10, 90]},
-                    "Piechota Kozacka": {
-                        "x": [50, 100],
-                        "y": [5, 95],
-                    },
-                    "Czern": {"x": [40, 80], "y": [10, 90]},
-                    "Jazda Tatarska": {"x": [5, 60], "y": [0, 100]},
-                    "Artyleria Kozacka": {"x": [30, 50], "y": [20, 80]},
-                },
-            },
-        },
-        "experiment_quality_vs_quantity": {
-            "id": "experiment_quality_vs_quantity",
-            "name": "Eksperyment: Husaria vs Czerń",
-            "description": "Test progu wytrzymałości elitarnej jazdy. 5 chorągwi Husarii przeciwko rosnącej fali Czerni (40 jednostek).",
-            "units": {
-                "Husaria": 5,
-                "Czern": 40,
-                "_deployment": {
-                    "Husaria": {"x": [100, 120], "y": [40, 60]},
-                    "Czern": {"x": [20, 60], "y": [10, 90]},
-                },
-            },
-        },
-        "experiment_firepower": {
-            "id": "experiment_firepower",
-            "name": "Eksperyment: Pojedynek Ogniowy",
-            "description": "Symetryczne starcie strzeleckie. 10 oddziałów Piechoty Niemieckiej vs 15 oddziałów Piechoty Kozackiej w otwartym polu.",
-            "units": {
-                "Piechota Niemiecka": 10,
-                "Piechota Kozacka": 15,
-                "_deployment": {
-                    "Piechota Niemiecka": {"x": [120, 130], "y": [10, 90]},
-                    "Piechota Kozacka": {"x": [30, 40], "y": [10, 90]},
-                },
-            },
-        },
-        "experiment_mobility": {
-            "id": "experiment_mobility",
-            "name": "Eksperyment: Szarża na Dragonów",
-            "description": "Czy szybka jazda tatarska (20 jednostek) zdoła dopaść i rozbić spieszoną Dragonię (10 jednostek) zanim zostanie wystrzelana?",
-            "units": {
-                "Dragonia": 10,
-                "Jazda Tatarska": 20,
-                "_deployment": {
-                    "Dragonia": {"x": [130, 140], "y": [30, 70]},
-                    "Jazda Tatarska": {"x": [20, 50], "y": [10, 90]},
-                },
-            },
-        },
-    }
 
-    for scenario in scenarios.values():
-        for unit in all_units:
-            if unit not in scenario["units"]:
-                scenario["units"][unit] = 0
+def _map_data_from_bundle(map_bundle):
+    tileset = map_bundle.tilesets[0] if map_bundle.tilesets else {}
+
+    tileset_image_path = f"assets/map/{tileset.get('image') or 'tileset_legacy.png'}"
+    if "map" in MAP_PATH:
+        tileset_image_path = "assets/map/tileset_legacy.png"
 
-    return jsonify(scenarios)
+    return {
+        "width": map_bundle.width,
+        "height": map_bundle.height,
+        "tile_width": map_bundle.tile_width,
+        "tile_height": map_bundle.tile_height,
+        "tiles": (map_bundle.gids & GID_MASK).tolist(),
+        "flip_flags": [
+            [{"h": bool(f & 4), "v": bool(f & 2), "d": bool(f & 1)} for f in row]
+            for row in map_bundle.flips.tolist()
+        ],
+        "tileset_image": tileset_image_path,
+        "tileset_columns": tileset.get("columns", 32),
+        "tileset_spacing": tileset.get("spacing", 0),
+        "tileset_firstgid": tileset.get("firstgid", 1),
+    }
 
 
 @app.route("/api/map-data", methods=["GET"])
@@ -369,6 +184,10 @@ def get_map_data():
     import xml.etree.ElementTree as ET
 
     try:
+        map_bundle = load_map_bundle(MAP_PATH)
+        if map_bundle is not None:
+            return jsonify(_map_data_from_bundle(map_bundle))
+
         tmx_data = pytmx.TiledMap(MAP_PATH)
 
         tree = ET.parse(MAP_PATH)
@@ -479,14 +298,27 @@ def get_map_data():
 
 @app.route("/api/start-simulation", methods=["POST"])
 def start_simulation():
-    global simulation, simulation_running, current_scenario_id
-
     data = request.json
     scenario_id = data.get("scenario_id", None)
     weather = data.get("weather", "clear")
+    seed = data.get("seed", None)
+    try:
+        tick_rate = float(data.get("tick_rate", TICK_RATE) or 0)
+    except (TypeError, ValueError):
+        return (
+            jsonify({"status": "error", "message": "tick_rate musi być liczbą"}),
+            400,
+        )
+    if not math.isfinite(tick_rate) or tick_rate < 0:
+        return (
+            jsonify(
+                {"status": "error", "message": "tick_rate musi być skończony i ≥ 0"}
+            ),
+            400,
+        )
+    tick_rate = clamp_tick_rate(tick_rate)
 
-    all_scenarios_response = get_scenarios()
-    all_scenarios = all_scenarios_response.json
+    all_scenarios = scenario_catalog()
 
     final_config = {}
 
@@ -500,22 +332,77 @@ def start_simulation():
 
     print(f"Start scenariusza: {scenario_id}, Pogoda: {weather}")
 
-    with simulation_lock:
-        simulation = BattleOfZborowModel(MAP_PATH, final_config, weather=weather)
-        simulation_running = True
-        current_scenario_id = scenario_id
+    try:
+        session_id = sessions.reserve(request.cookies.get(SESSION_COOKIE))
+    except SessionLimitError as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    try:
+        model = BattleOfZborowModel(MAP_PATH, final_config, weather=weather, seed=seed)
+        sessions.create(session_id, model, scenario_id, tick_rate=tick_rate)
+    except SessionLimitError as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    except Exception:
+        sessions.release(session_id)
+        raise
+
+    response = jsonify({"status": "started", "message": "Symulacja rozpoczęta"})
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="Lax")
+    return response
+
+
+@app.route("/api/battle-outcome", methods=["POST"])
+def battle_outcome():
+    data = request.get_json(silent=True) or {}
+    scenario_id = data.get("scenario_id", "custom")
+    weather = data.get("weather", "clear")
+    if weather not in WEATHERS:
+        return jsonify({"error": f"Nieznana pogoda: {weather}"}), 400
+    try:
+        seed = int(data.get("seed", 0))
+        max_steps = int(data.get("max_steps", 3000))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seed i max_steps muszą być liczbami"}), 400
+    if not 1 <= max_steps <= MAX_OUTCOME_STEPS:
+        return (
+            jsonify({"error": f"max_steps musi być w zakresie 1-{MAX_OUTCOME_STEPS}"}),
+            400,
+        )
+
+    all_scenarios = scenario_catalog()
+    if scenario_id in all_scenarios:
+        units_config = all_scenarios[scenario_id]["units"]
+    else:
+        units_config = data.get("units_config")
+    if not units_config:
+        return jsonify({"error": "Nieznany scenariusz i brak units_config"}), 400
+
+    try:
+        job_id, result = get_outcome_jobs().submit(
+            scenario_id, weather, seed, max_steps, MAP_PATH, units_config
+        )
+    except JobLimitError as e:
+        return jsonify({"error": str(e)}), 503
+
+    if result is not None:
+        return jsonify(result)
+    return jsonify({"job_id": job_id, "status": "pending"}), 202
+
 
-    return jsonify({"status": "started", "message": "Symulacja rozpoczęta"})
+@app.route("/api/battle-outcome/<job_id>", methods=["GET"])
+def battle_outcome_status(job_id):
+    status = get_outcome_jobs().status(job_id)
+    if status is None:
+        return jsonify({"error": "Nie znaleziono zadania"}), 404
+    if status["status"] == "pending":
+        return jsonify(status), 202
+    if status["status"] == "error":
+        return jsonify(status), 500
+    return jsonify(status["result"])
 
 
 @app.route("/api/stop-simulation", methods=["POST"])
 def stop_simulation():
-    global simulation, simulation_running, current_scenario_id
-
-    with simulation_lock:
-        simulation_running = False
-        simulation = None
-        current_scenario_id = None
+    sessions.remove(request.cookies.get(SESSION_COOKIE))
 
     return jsonify(
         {"status": "stopped", "message": "Symulacja zatrzymana i wyczyszczona"}
@@ -524,29 +411,25 @@ def stop_simulation():
 
 @app.route("/api/save-battle-result", methods=["POST"])
 def save_battle_result():
-    global current_scenario_id, simulation
-
     try:
         data = request.json
+        session = current_session()
 
         heatmap_data = None
-        with simulation_lock:
-            if simulation is not None:
-                h_crown = getattr(simulation, "heatmap_crown", None)
-                h_cossack = getattr(simulation, "heatmap_cossack", None)
+        scenario_id = None
+        if session is not None:
+            with session.lock:
+                scenario_id = session.scenario_id
+                h_crown = getattr(session.model, "heatmap_crown", None)
+                h_cossack = getattr(session.model, "heatmap_cossack", None)
 
                 if h_crown is not None and h_cossack is not None:
-                    heatmap_data = {
-                        "crown": h_crown.tolist(),
-                        "cossack": h_cossack.tolist(),
-                        "width": simulation.width,
-                        "height": simulation.height,
-                    }
+                    heatmap_data = encode_heatmap(h_crown, h_cossack)
 
         battle_result = {
             "id": str(uuid.uuid4()),
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "scenario_id": current_scenario_id or data.get("scenario_id", "unknown"),
+            "scenario_id": scenario_id or data.get("scenario_id", "unknown"),
             "scenario_name": data.get("scenario_name", "Unknown"),
             "winner": data.get("winner", "Unknown"),
             "survivors": data.get("survivors", 0),
@@ -581,85 +464,37 @@ def save_battle_result():
 
 @app.route("/api/simulation-step", methods=["GET"])
 def simulation_step():
-    global simulation, simulation_running
-
-    with simulation_lock:
-        if simulation is None:
-            return jsonify({"error": "Symulacja nie została rozpoczęta"}), 400
-
-        if simulation_running:
-            print(f"Executing step... Agents: {len(simulation.schedule.agents)}")
-            simulation.step()
-
-        agents_data = []
-        for agent in simulation.schedule.agents:
-            if agent.hp <= 0:
-                continue
-
-            pos = agent.get_pos_tuple()
-            agents_data.append(
-                {
-                    "id": agent.unique_id,
-                    "faction": agent.faction,
-                    "unit_type": agent.unit_type,
-                    "x": pos[0],
-                    "y": pos[1],
-                    "hp": agent.hp,
-                    "max_hp": agent.max_hp,
-                    "morale": agent.morale,
-                    "max_morale": agent.max_morale,
-                    "state": agent.state,
-                    "sprite_path": simulation.unit_params[agent.unit_type][
-                        "sprite_path"
-                    ],
-                }
-            )
+    session = current_session()
+    if session is None:
+        return no_session_response()
 
-        stats = {
-            "crown_count": len(
-                [
-                    a
-                    for a in simulation.schedule.agents
-                    if a.faction == "Armia Koronna" and a.hp > 0
-                ]
-            ),
-            "cossack_count": len(
-                [
-                    a
-                    for a in simulation.schedule.agents
-                    if a.faction == "Kozacy/Tatarzy" and a.hp > 0
-                ]
-            ),
-            "total_agents": len([a for a in simulation.schedule.agents if a.hp > 0]),
-            "steps": simulation.schedule.steps,
-        }
+    return Response(session.snapshot.body, mimetype="application/json")
 
-        battle_status = simulation.get_battle_status()
 
-        healing_zones_data = [{"x": x, "y": y} for x, y in simulation.healing_centers]
+@app.route("/api/pause-simulation", methods=["POST"])
+def pause_simulation():
+    session = current_session()
+    if session is None:
+        return no_session_response()
 
-        return jsonify(
-            {
-                "agents": agents_data,
-                "stats": stats,
-                "battle_status": battle_status,
-                "running": simulation_running,
-                "map_width": simulation.grid.width,
-                "map_height": simulation.grid.height,
-                "healing_zones": healing_zones_data,
-            }
-        )
+    data = request.get_json(silent=True) or {}
+    paused = data.get("paused", not session.ticker.paused)
+    if paused:
+        session.ticker.pause()
+    else:
+        session.ticker.resume()
+
+    return jsonify({"status": "paused" if paused else "running", "paused": paused})
 
 
 @app.route("/api/simulation-frame", methods=["GET"])
 def get_simulation_frame():
-    global simulation
-
-    if simulation is None:
-        return jsonify({"error": "Symulacja nie została rozpoczęta"}), 400
+    session = current_session()
+    if session is None:
+        return no_session_response()
 
-    with simulation_lock:
-        renderer = WebRenderer(simulation)
+    with session.lock:
+        renderer = WebRenderer(session.model)
         frame = renderer.render_frame()
 
         buffered = io.BytesIO()
@@ -667,48 +502,53 @@ def get_simulation_frame():
         img_str = base64.b64encode(buffered.getvalue()).decode()
 
         return jsonify(
-            {"frame": f"data:image/png;base64,{img_str}", "running": simulation_running}
+            {"frame": f"data:image/png;base64,{img_str}", "running": session.running}
         )
 
 
-def stream_simulation():
-    global simulation, simulation_running
-
-    while simulation_running:
-        if simulation is not None:
-            with simulation_lock:
-                simulation.step()
-                renderer = WebRenderer(simulation)
-                frame = renderer.render_frame()
+def stream_simulation(session):
+    while session.running:
+        with session.lock:
+            session.touch()
+            renderer = WebRenderer(session.model)
+            frame = renderer.render_frame()
 
-                buffered = io.BytesIO()
-                frame.save(buffered, format="JPEG", quality=85)
-                img_bytes = buffered.getvalue()
+            buffered = io.BytesIO()
+            frame.save(buffered, format="JPEG", quality=85)
+            img_bytes = buffered.getvalue()
 
-            yield (
-                b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + img_bytes + b"\r\n"
-            )
+        yield (
+            b"--frame\r\n" b"Content-Type: image/jpeg\r\n\r\n" + img_bytes + b"\r\n"
+        )
 
-            time.sleep(0.2)
-        else:
-            time.sleep(0.1)
+        time.sleep(0.2)
 
 
 @app.route("/api/video-feed")
 def video_feed():
+    session = current_session()
+    if session is None:
+        return no_session_response()
+
     return Response(
-        stream_simulation(), mimetype="multipart/x-mixed-replace; boundary=frame"
+        stream_simulation(session),
+        mimetype="multipart/x-mixed-replace; boundary=frame",
     )
 
 
+@app.route("/api/sessions", methods=["GET"])
+def get_sessions():
+    sessions.update_memory()
+    return jsonify(sessions.stats())
+
+
 @app.route("/api/map-image")
 def get_map_image():
     try:
-        global simulation
-
-        model_to_render = simulation
+        session = current_session()
+        model_to_render = session.model if session else None
         if model_to_render is None:
-            model_to_render = BattleOfZborowModel(MAP_PATH, {})
+            model_to_render = load_map_assets(MAP_PATH)
 
         renderer = WebRenderer(model_to_render, scale=1)
         image = renderer.render_map_only()
@@ -743,12 +583,12 @@ def get_heatmap_image(result_id):
         if not result or not result.get("heatmap"):
             return jsonify({"error": "Result or heatmap data not found"}), 404
 
-        heatmap_data = result["heatmap"]
+        heatmap_data = decode_heatmap(result["heatmap"])
 
-        global simulation
-        model_to_render = simulation
+        session = current_session()
+        model_to_render = session.model if session else None
         if model_to_render is None:
-            model_to_render = BattleOfZborowModel(MAP_PATH, {})
+            model_to_render = load_map_assets(MAP_PATH)
 
         renderer = WebRenderer(model_to_render, scale=1)
 
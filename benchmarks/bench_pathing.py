@@ -0,0 +1,88 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pathfinding.core.grid import Grid
+from pathfinding.finder.a_star import AStarFinder
+
+from simulation.model import BattleOfZborowModel
+from simulation.pathing import PathEngine
+
+MAP_PATH = os.path.join(ROOT, "assets", "map", "map.tmx")
+
+
+def legacy_find_path(grid, start, goal, occupied):
+    blocked = []
+    for x, y in occupied:
+        if (x, y) != goal:
+            node = grid.node(x, y)
+            if node.walkable:
+                node.walkable = False
+                blocked.append(node)
+
+    path, _ = AStarFinder().find_path(
+        grid.node(start[0], start[1]), grid.node(goal[0], goal[1]), grid
+    )
+
+    for node in blocked:
+        node.walkable = True
+    grid.cleanup()
+    return [(node.x, node.y) for node in path[1:]] if path else []
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Porównanie AStarFinder (pathfinding) z PathEngine na mapie Zborowa."
+    )
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--agents", type=int, default=150)
+    parser.add_argument("--weather", default="clear", choices=["clear", "rain", "fog"])
+    parser.add_argument("--seed", type=int, default=1649)
+    args = parser.parse_args()
+
+    model = BattleOfZborowModel(MAP_PATH, {}, weather=args.weather)
+    costs = model.terrain_costs
+    height, width = costs.shape
+    rng = random.Random(args.seed)
+
+    cells = [(x, y) for y in range(height) for x in range(width)]
+    occupied = rng.sample(cells, args.agents)
+    occupied_set = set(occupied)
+    free = [c for c in cells if c not in occupied_set]
+    pairs = [tuple(rng.sample(free, 2)) for _ in range(args.searches)]
+
+    occupancy = model.grid.occupancy.copy()
+    for x, y in occupied:
+        occupancy[y, x] = 1
+
+    grid = Grid(matrix=costs.tolist())
+    t0 = time.perf_counter()
+    legacy_paths = [legacy_find_path(grid, s, g, occupied) for s, g in pairs]
+    legacy_time = time.perf_counter() - t0
+
+    engine = PathEngine(costs)
+    t0 = time.perf_counter()
+    engine_paths = [engine.find_path(s, g, occupancy) for s, g in pairs]
+    engine_time = time.perf_counter() - t0
+
+    mismatches = 0
+    for (start, _), old, new in zip(pairs, legacy_paths, engine_paths):
+        if bool(old) != bool(new):
+            mismatches += 1
+        elif old and abs(engine.path_cost(start, old) - engine.path_cost(start, new)) > 1e-6:
+            mismatches += 1
+
+    print(f"Mapa {width}x{height}, pogoda: {args.weather}, zajęte pola: {args.agents}")
+    print(f"AStarFinder: {legacy_time * 1000 / args.searches:8.2f} ms / wyszukiwanie")
+    print(f"PathEngine:  {engine_time * 1000 / args.searches:8.2f} ms / wyszukiwanie")
+    print(f"Przyspieszenie: {legacy_time / engine_time:.1f}x")
+    print(f"Ścieżki o różnym koszcie: {mismatches}/{args.searches}")
+
+
+if __name__ == "__main__":
+    main()
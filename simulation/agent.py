@@ -1,49 +1,113 @@
 import mesa
-from pathfinding.finder.a_star import AStarFinder
-import random
+from .agent_store import (
+    STATES,
+    STATE_CODES,
+    TOMBSTONE,
+    column_property,
+    name_property,
+    position_property,
+    table_property,
+)
+from .path_scheduler import PRIORITY_COMBAT, PRIORITY_FLEEING, PRIORITY_STRATEGIC
 
 
 class MilitaryAgent(mesa.Agent):
+    __slots__ = ("unique_id", "model", "_store", "_slot")
+
+    faction = name_property("faction", "faction_names")
+    unit_type = name_property("unit_type", "unit_type_names")
+    pos = position_property("x", "y")
+    path_target_pos = position_property("path_target_x", "path_target_y")
+    strategic_target = position_property("strategic_x", "strategic_y")
+    path = table_property("paths")
+    waypoints = table_property("waypoints")
+
+    hp = column_property("hp", float)
+    max_hp = column_property("max_hp", float)
+    morale = column_property("morale", float)
+    max_morale = column_property("max_morale", float)
+    discipline = column_property("discipline", int)
+    defense = column_property("defense", int)
+    speed = column_property("speed", int)
+    ammo = column_property("ammo", int)
+    fire_cooldown = column_property("fire_cooldown", float)
+    repath_timer = column_property("repath_timer", int)
+
     def __init__(self, unique_id, model, faction, unit_type):
+        self._store = model.agent_store
+        self._slot = self._store.allocate(self, faction, unit_type)
         super().__init__(unique_id, model)
-        self.faction = faction
-        self.unit_type = unit_type
-
-        params = self.model.unit_params[self.unit_type]
-
-        self.hp = params["hp"]
-        self.max_hp = params["hp"]
-        self.morale = params["morale"]
-        self.max_morale = params["morale"]
-        self.discipline = params.get("discipline", 50)
-        self.defense = params.get("defense", 0)
-        self.speed = params.get("speed", 1)
-        self.rate_of_fire = params.get("rate_of_fire", 1.0)
-        self.fire_cooldown = 0.0
 
-        self.melee_damage = params.get("melee_damage", 10)
-        self.ranged_damage = params.get("ranged_damage", 0)
-        self.attack_range = params.get("range", 1)
-        self.ammo = params.get("ammo", 0)
-        self.max_ammo = self.ammo
+        unit = self.unit
+
+        self.hp = unit.hp
+        self.max_hp = unit.hp
+        self.morale = unit.morale
+        self.max_morale = unit.morale
+        self.discipline = unit.discipline
+        self.defense = unit.defense
+        self.speed = unit.speed
+        self.fire_cooldown = 0.0
+        self.ammo = unit.ammo
 
         self.state = "IDLE"
-        self.path = []
-        self.path_target_pos = None
         self.repath_timer = self.random.randint(0, 10)
-        self.target_pos_tuple = None
 
         self._assign_strategic_target()
 
+    @property
+    def unit(self):
+        return self.model.unit_params[self.unit_type]
+
+    @property
+    def rate_of_fire(self):
+        return self.unit.rate_of_fire
+
+    @property
+    def melee_damage(self):
+        return self.unit.melee_damage
+
+    @property
+    def ranged_damage(self):
+        return self.unit.ranged_damage
+
+    @property
+    def attack_range(self):
+        return self.unit.range
+
+    @property
+    def max_ammo(self):
+        return self.unit.ammo
+
+    @property
+    def state(self):
+        return STATES[self._store.state[self._slot]]
+
+    @state.setter
+    def state(self, value):
+        self._store.state[self._slot] = STATE_CODES[value]
+
+    @property
+    def slot(self):
+        return self._slot
+
+    def release_slot(self):
+        self._store.release(self._slot)
+        self._slot = TOMBSTONE
+
     def _assign_strategic_target(self):
         safe_margin = min(20, self.model.grid.width // 4)
         center_y = self.model.grid.height // 2
 
         if self.faction == "Armia Koronna":
-            target_x = random.randint(safe_margin, self.model.grid.width - safe_margin)
+            target_x = self.random.randint(
+                safe_margin, self.model.grid.width - safe_margin
+            )
             target_y = max(10, min(center_y, self.model.grid.height - 20))
         else:
-            target_x = random.randint(safe_margin, self.model.grid.width - safe_margin)
+            target_x = self.random.randint(
+                safe_margin, self.model.grid.width - safe_margin
+            )
             target_y = max(20, min(center_y, self.model.grid.height - 10))
         self.strategic_target = (target_x, target_y)
 
@@ -60,30 +124,12 @@ class MilitaryAgent(mesa.Agent):
         elif self.model.weather == "rain":
             vision_radius = 12
 
-        neighbors = self.model.grid.get_neighbors(
-            self.pos, moore=True, include_center=False, radius=vision_radius
+        return self.model.grid.index.nearest_enemy(
+            self.get_pos_tuple(), self.faction, vision_radius
         )
-        enemies = [
-            agent
-            for agent in neighbors
-            if isinstance(agent, MilitaryAgent) and agent.faction != self.faction
-        ]
-        if enemies:
-            return min(enemies, key=lambda e: self.distance_to(e))
-        return None
 
     def find_any_enemy(self):
-        all_agents = self.model.schedule.agents
-        enemies = [
-            agent
-            for agent in all_agents
-            if isinstance(agent, MilitaryAgent)
-            and agent.faction != self.faction
-            and agent.hp > 0
-        ]
-        if enemies:
-            return min(enemies, key=lambda e: self.distance_to(e))
-        return None
+        return self.model.enemy_query.nearest_enemy(self)
 
     def distance_to_pos(self, pos1, pos2):
         return max(abs(pos1[0] - pos2[0]), abs(pos1[1] - pos2[1]))
@@ -95,13 +141,11 @@ class MilitaryAgent(mesa.Agent):
         if not self.path:
             return
 
-        next_pos_node = self.path[0]
-        next_pos_tuple = (next_pos_node.x, next_pos_node.y)
+        next_pos_tuple = self.path[0]
 
         try:
-            terrain_cost = self.model.terrain_costs[next_pos_tuple[1]][
-                next_pos_tuple[0]
-            ]
+            x, y = next_pos_tuple
+            terrain_cost = self.model.terrain_costs[y, x]
             move_chance = self.speed / (terrain_cost * 5.0)
             if self.random.random() > move_chance:
                 return
@@ -117,18 +161,64 @@ class MilitaryAgent(mesa.Agent):
             isinstance(obj, MilitaryAgent) and obj.hp > 0 for obj in cell_contents
         )
 
-        if not blocking_unit:
-            self.model.grid.move_agent(self, next_pos_tuple)
-            self.path.pop(0)
-        else:
-            self.path = []
+        if blocking_unit:
+            self.repair_path()
+            if not self.path:
+                return
 
-    def get_current_healing_center(self):
+        self.model.grid.move_agent(self, self.path[0])
+        self.path.pop(0)
+
+    def repair_path(self, lookahead=3):
+        stats = self.model.avoidance_stats
         current_pos = self.get_pos_tuple()
-        for center in self.model.healing_centers:
-            if self.distance_to_pos(current_pos, center) <= 1:
-                return center
-        return None
+        blocked_pos = self.path[0]
+        remaining = self.path[1:]
+
+        if remaining:
+            grid = self.model.grid
+            costs = self.model.terrain_costs
+            impassable = self.model.impassable_mask
+            best = None
+            best_key = None
+            x, y = current_pos
+            for dx in [-1, 0, 1]:
+                for dy in [-1, 0, 1]:
+                    side = (x + dx, y + dy)
+                    if side == current_pos or side == blocked_pos:
+                        continue
+                    if grid.out_of_bounds(side) or not grid.is_cell_empty(side):
+                        continue
+                    if impassable[side[1], side[0]]:
+                        continue
+                    cost = costs[side[1], side[0]]
+                    for j in range(min(lookahead, len(remaining)) - 1, -1, -1):
+                        if self.distance_to_pos(side, remaining[j]) <= 1:
+                            key = (j, -cost)
+                            if best_key is None or key > best_key:
+                                best, best_key = (side, j), key
+                            break
+
+            if best:
+                side, j = best
+                if side == remaining[j]:
+                    self.path = remaining[j:]
+                else:
+                    self.path = [side] + remaining[j:]
+                stats["sidestep"] += 1
+                return
+
+            detour = self.model.find_detour(current_pos, remaining)
+            if detour:
+                self.path = detour
+                stats["detour"] += 1
+                return
+
+        stats["replan"] += 1
+        self.path = []
+
+    def get_current_healing_center(self):
+        return self.model.healing_center_at(self.get_pos_tuple())
 
     def calculate_path(self, target_pos_tuple):
         if not isinstance(target_pos_tuple, tuple):
@@ -143,7 +233,7 @@ class MilitaryAgent(mesa.Agent):
 
                     if self.distance_to_pos(self.get_pos_tuple(), entrance) <= 1:
                         self.path_target_pos = entrance
-                        self.path = [self.model.path_grid.node(entrance[0], entrance[1])]
+                        self.path = [entrance]
                         return
 
         self.path_target_pos = target_pos_tuple
@@ -151,132 +241,90 @@ class MilitaryAgent(mesa.Agent):
 
         if current_pos == target_pos_tuple:
             self.path = []
+            self.waypoints = []
             return
 
-        finder = AStarFinder()
-        start_node = self.model.path_grid.node(current_pos[0], current_pos[1])
-        end_node = self.model.path_grid.node(target_pos_tuple[0], target_pos_tuple[1])
-
-        temp_blocked_nodes = []
+        self.waypoints = self.model.plan_route(current_pos, target_pos_tuple)
+        self.path = []
+        if self.waypoints:
+            self.refine_segment()
 
-        for agent in self.model.schedule.agents:
-            if isinstance(agent, MilitaryAgent) and agent.hp > 0 and agent != self:
-                pos = agent.get_pos_tuple()
-                if pos != target_pos_tuple:
-                    node = self.model.path_grid.node(pos[0], pos[1])
-                    if node.walkable:
-                        node.walkable = False
-                        temp_blocked_nodes.append(node)
+    def request_path(self, target_pos_tuple, priority):
+        self.model.path_scheduler.request(self, target_pos_tuple, priority)
 
-        if not end_node.walkable:
-            for node in temp_blocked_nodes:
-                node.walkable = True
-            self.path = []
-            return
+    def refine_next_segment(self):
+        if not self.path and self.waypoints:
+            self.model.path_scheduler.refine(self)
 
-        path, _ = finder.find_path(start_node, end_node, self.model.path_grid)
+    def refine_segment(self):
+        self.path = self.model.find_path(self.get_pos_tuple(), self.waypoints.pop(0))
 
-        for node in temp_blocked_nodes:
-            node.walkable = True
-
-        self.model.path_grid.cleanup()
-        self.path = path[1:] if path else []
+    def follow_field(self, field):
+        current_pos = self.get_pos_tuple()
+        is_free = self.model.grid.is_cell_empty
+        # A detour around a blocked step is kept until it is walked or blocked;
+        # the field would otherwise pull the unit straight back.
+        on_detour = self.path_target_pos is None and len(self.path) > 1
+        if not (on_detour and is_free(self.path[0])):
+            next_pos = field.next_step(current_pos, is_free)
+            if next_pos:
+                path = [next_pos]
+            else:
+                path = self.model.find_detour(current_pos, field.descent(current_pos))
+            if not path:
+                side_pos = field.side_step(current_pos, is_free)
+                path = [side_pos] if side_pos else []
+            self.path = path
+        self.waypoints = []
+        self.path_target_pos = None
 
     def should_recalculate_path(self, current_target_pos):
-        if not self.path:
+        if self.path_target_pos:
+            if self.distance_to_pos(self.path_target_pos, current_target_pos) > 5:
+                return True
+        self.refine_next_segment()
+        if not self.path and not self.waypoints:
             return True
         self.repath_timer += 1
         if self.repath_timer > 15:
             self.repath_timer = 0
             return True
-        if self.path_target_pos:
-            if self.distance_to_pos(self.path_target_pos, current_target_pos) > 5:
-                return True
         return False
 
-    def receive_damage(self, amount):
-        damage_reduction = min(amount - 1, self.random.randint(0, self.defense // 2))
-        actual_damage = max(1, amount - damage_reduction)
-        self.hp = max(0, self.hp - actual_damage)
-
-        morale_loss = actual_damage * 1.5
-        if self.discipline > 80:
-            morale_loss *= 0.7
-        self.morale = max(0, self.morale - morale_loss)
-
-        if self.hp <= 0:
-            self.trigger_death_panic()
-
-    def trigger_death_panic(self):
-        neighbors = self.model.grid.get_neighbors(
-            self.pos, moore=True, include_center=False, radius=3
-        )
-        for neighbor in neighbors:
-            if (
-                isinstance(neighbor, MilitaryAgent)
-                and neighbor.faction == self.faction
-                and neighbor.state != "FLEEING"
-                and neighbor.hp > 0
-            ):
-                panic_damage = 20
-                resistance = neighbor.discipline / 5
-                actual_panic = max(0, panic_damage - resistance)
-
-                neighbor.morale = max(0, neighbor.morale - actual_panic)
+    def reset_path(self):
+        self.path = []
+        self.waypoints = []
 
     def trigger_chain_panic(self):
-        neighbors = self.model.grid.get_neighbors(
-            self.pos, moore=True, include_center=False, radius=3
-        )
-        for neighbor in neighbors:
-            if (
-                isinstance(neighbor, MilitaryAgent)
-                and neighbor.faction == self.faction
-                and neighbor.state != "FLEEING"
-                and neighbor.hp > 0
-            ):
-                panic_damage = 10
-                resistance = neighbor.discipline / 5
-                actual_panic = max(0, panic_damage - resistance)
-
-                neighbor.morale = max(0, neighbor.morale - actual_panic)
+        self.model.panic.record(self, "chain")
 
     def manage_fleeing(self):
         current_pos = self.get_pos_tuple()
+        edge_field = self.model.edge_field
 
         if self.faction == "Armia Koronna":
-            centers = self.model.healing_centers
-            sorted_centers = sorted(centers, key=lambda z: self.distance_to_pos(current_pos, z))
-
             target_center = None
-            for center in sorted_centers:
-                if not self.model.is_zone_full(center):
+            dist_heal = None
+            for center in self.model.healing_centers:
+                if self.model.is_zone_full(center):
+                    continue
+                d = self.model.healing_fields[center].distance(current_pos)
+                if dist_heal is None or d < dist_heal:
                     target_center = center
-                    break
+                    dist_heal = d
 
-            w = self.model.grid.width
-            h = self.model.grid.height
-            x, y = current_pos
-
-            d_left = x
-            d_right = w - 1 - x
-            d_top = y
-            d_bottom = h - 1 - y
-            dist_edge = min(d_left, d_right, d_top, d_bottom)
-
-            should_flee_to_edge = False
-            if target_center:
-                dist_heal = self.distance_to_pos(current_pos, target_center)
-                if dist_heal > 2 * dist_edge:
-                    should_flee_to_edge = True
-            else:
-                should_flee_to_edge = True
+            should_flee_to_edge = (
+                target_center is None
+                or dist_heal > 2 * edge_field.distance(current_pos)
+            )
 
-            if not should_flee_to_edge and target_center:
+            if not should_flee_to_edge:
                 entrance = self.model.get_healing_entrance(target_center)
+                w = self.model.grid.width
+                h = self.model.grid.height
 
                 if self.distance_to_pos(current_pos, target_center) > 1 and current_pos != entrance:
-                    self.calculate_path(entrance)
+                    self.follow_field(self.model.healing_fields[target_center])
 
                 elif current_pos == entrance:
                     cx, cy = target_center
@@ -290,14 +338,13 @@ class MilitaryAgent(mesa.Agent):
 
                     target_entry = None
                     for tile in potential_entries:
-                        cell_contents = self.model.grid.get_cell_list_contents([tile])
-                        if not any(isinstance(a, MilitaryAgent) for a in cell_contents):
+                        if self.model.grid.is_cell_empty(tile):
                             target_entry = tile
                             break
 
                     if target_entry:
                         self.model.grid.move_agent(self, target_entry)
-                        self.path = []
+                        self.reset_path()
                         return
                     else:
                         return
@@ -311,44 +358,16 @@ class MilitaryAgent(mesa.Agent):
                         for dy in [-1, 0, 1]:
                             tx, ty = cx + dx, cy + dy
                             if 0 <= tx < w and 0 <= ty < h:
-                                cell_contents = self.model.grid.get_cell_list_contents([(tx, ty)])
-                                if not any(isinstance(a, MilitaryAgent) for a in cell_contents):
+                                if self.model.grid.is_cell_empty((tx, ty)):
                                     d = self.distance_to_pos(current_pos, (tx, ty))
                                     if d > max_dist:
                                         max_dist = d
                                         best_tile = (tx, ty)
-                    self.calculate_path(best_tile)
+                    self.request_path(best_tile, PRIORITY_FLEEING)
             else:
-                if dist_edge == d_left:
-                    target = (0, y)
-                elif dist_edge == d_right:
-                    target = (w - 1, y)
-                elif dist_edge == d_top:
-                    target = (x, 0)
-                else:
-                    target = (x, h - 1)
-                self.calculate_path(target)
+                self.follow_field(edge_field)
         else:
-            w = self.model.grid.width
-            h = self.model.grid.height
-            x, y = current_pos
-
-            d_left = x
-            d_right = w - 1 - x
-            d_top = y
-            d_bottom = h - 1 - y
-
-            dist_edge = min(d_left, d_right, d_top, d_bottom)
-
-            if dist_edge == d_left:
-                target = (0, y)
-            elif dist_edge == d_right:
-                target = (w - 1, y)
-            elif dist_edge == d_top:
-                target = (x, 0)
-            else:
-                target = (x, h - 1)
-            self.calculate_path(target)
+            self.follow_field(edge_field)
 
     def step(self):
         if self.hp <= 0:
@@ -365,7 +384,8 @@ class MilitaryAgent(mesa.Agent):
                 self.manage_fleeing()
 
         if self.state == "FLEEING":
-            if not self.path and self.faction == "Armia Koronna":
+            self.refine_next_segment()
+            if not self.path and not self.waypoints:
                 self.manage_fleeing()
 
             if self.path:
@@ -386,19 +406,16 @@ class MilitaryAgent(mesa.Agent):
                         self.ammo -= 1
                         self.fire_cooldown = max(0.1, 1.0 / max(0.1, self.rate_of_fire))
 
-                        enemy_pos = enemy.get_pos_tuple()
-                        terrain_cover = self.model.terrain_costs[enemy_pos[1]][enemy_pos[0]]
-                        dmg = self.ranged_damage
-                        if terrain_cover > 1.5:
-                            dmg *= 0.6
-                        enemy.receive_damage(dmg)
+                        self.model.combat.queue_attack(
+                            self, enemy, self.ranged_damage, ranged=True
+                        )
                     else:
                         pass
                 else:
                     self.state = "MOVING"
                     epos = enemy.get_pos_tuple()
                     if self.should_recalculate_path(epos):
-                        self.calculate_path(epos)
+                        self.request_path(epos, PRIORITY_COMBAT)
                     if self.path:
                         self.move()
 
@@ -406,44 +423,46 @@ class MilitaryAgent(mesa.Agent):
                 enemy_pos = enemy.get_pos_tuple()
                 my_pos = self.get_pos_tuple()
 
-                enemy_on_tower = enemy_pos in self.model.healing_tiles
-                me_on_tower = my_pos in self.model.healing_tiles
+                healing_mask = self.model.healing_mask
+                enemy_on_tower = healing_mask[enemy_pos[1], enemy_pos[0]]
+                me_on_tower = healing_mask[my_pos[1], my_pos[0]]
 
                 if enemy_on_tower and not me_on_tower:
                     pass
                 else:
                     self.state = "ATTACKING"
-                    self.path = []
+                    self.reset_path()
                     if self.random.random() < 0.8:
-                        dmg = self.melee_damage
-                        if "Husaria" in self.unit_type or "Jazda" in self.unit_type:
-                            dmg *= 1.5
-                        enemy.receive_damage(dmg)
+                        dmg = self.melee_damage * self.unit.charge_multiplier
+                        self.model.combat.queue_attack(self, enemy, dmg)
 
             else:
                 self.state = "MOVING"
                 epos = enemy.get_pos_tuple()
                 if self.should_recalculate_path(epos):
-                    self.target_pos_tuple = epos
-                    self.calculate_path(epos)
+                    self.request_path(epos, PRIORITY_COMBAT)
                 if self.path:
                     self.move()
 
         else:
             self.state = "MOVING_TO_STRATEGIC"
             distant_enemy = self.find_any_enemy()
-            target = (
-                distant_enemy.get_pos_tuple()
-                if distant_enemy
-                else self.strategic_target
-            )
 
-            if self.should_recalculate_path(target):
-                self.calculate_path(target)
+            if distant_enemy and not self.get_current_healing_center():
+                self.follow_field(self.model.get_target_field(distant_enemy))
+            else:
+                target = (
+                    distant_enemy.get_pos_tuple()
+                    if distant_enemy
+                    else self.strategic_target
+                )
+
+                if self.should_recalculate_path(target):
+                    self.request_path(target, PRIORITY_STRATEGIC)
 
             if self.path:
                 self.move()
             else:
                 if self.distance_to_pos(current_pos, self.strategic_target) < 3:
                     self._assign_strategic_target()
-                    self.path = []
+                    self.reset_path()
@@ -0,0 +1,202 @@
+import numpy as np
+
+
+STATES = ("IDLE", "MOVING", "MOVING_TO_STRATEGIC", "ATTACKING", "FLEEING")
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+
+COLUMNS = (
+    ("hp", np.float64),
+    ("morale", np.float64),
+    ("max_hp", np.float32),
+    ("max_morale", np.float32),
+    ("fire_cooldown", np.float32),
+    ("discipline", np.int16),
+    ("defense", np.int16),
+    ("ammo", np.int16),
+    ("x", np.int16),
+    ("y", np.int16),
+    ("path_target_x", np.int16),
+    ("path_target_y", np.int16),
+    ("strategic_x", np.int16),
+    ("strategic_y", np.int16),
+    ("unit_type", np.uint16),
+    ("speed", np.uint8),
+    ("state", np.uint8),
+    ("repath_timer", np.uint8),
+    ("faction", np.uint8),
+    ("alive", np.bool_),
+)
+
+POSITIONS = (
+    ("x", "y"),
+    ("path_target_x", "path_target_y"),
+    ("strategic_x", "strategic_y"),
+)
+
+TOMBSTONE = 0
+
+
+class AgentStore:
+    def __init__(self, capacity=256):
+        self.capacity = 0
+        self.size = 1
+        self.free = []
+        self.agents = [None]
+        self.paths = [None]
+        self.waypoints = [None]
+        self.factions = {}
+        self.faction_names = []
+        self.unit_types = {}
+        self.unit_type_names = []
+        self.live_counts = {}
+        self.pending_deaths = []
+        for name, dtype in COLUMNS:
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self._grow(max(2, capacity))
+        self._clear_positions(TOMBSTONE)
+
+    def _grow(self, capacity):
+        for name, dtype in COLUMNS:
+            column = np.zeros(capacity, dtype=dtype)
+            column[: self.capacity] = getattr(self, name)
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def _clear_positions(self, slot):
+        for x_name, y_name in POSITIONS:
+            getattr(self, x_name)[slot] = -1
+            getattr(self, y_name)[slot] = -1
+
+    def code_of(self, faction):
+        code = self.factions.get(faction)
+        if code is None:
+            code = self.factions[faction] = len(self.faction_names)
+            self.faction_names.append(faction)
+        return code
+
+    def type_code_of(self, unit_type):
+        code = self.unit_types.get(unit_type)
+        if code is None:
+            code = self.unit_types[unit_type] = len(self.unit_type_names)
+            self.unit_type_names.append(unit_type)
+        return code
+
+    def allocate(self, agent, faction, unit_type):
+        if self.free:
+            slot = self.free.pop()
+            self.agents[slot] = agent
+            self.paths[slot] = []
+            self.waypoints[slot] = []
+        else:
+            if self.size == self.capacity:
+                self._grow(self.capacity * 2)
+            slot = self.size
+            self.size += 1
+            self.agents.append(agent)
+            self.paths.append([])
+            self.waypoints.append([])
+
+        for name, _ in COLUMNS:
+            getattr(self, name)[slot] = 0
+        self._clear_positions(slot)
+        code = self.code_of(faction)
+        self.faction[slot] = code
+        self.live_counts[code] = self.live_counts.get(code, 0) + 1
+        self.unit_type[slot] = self.type_code_of(unit_type)
+        self.alive[slot] = True
+        return slot
+
+    def release(self, slot):
+        self.alive[slot] = False
+        self.agents[slot] = None
+        self.paths[slot] = None
+        self.waypoints[slot] = None
+        self.free.append(slot)
+
+    def living(self, faction=None):
+        mask = self.alive[: self.size] & (self.hp[: self.size] > 0)
+        if faction is not None:
+            code = self.factions.get(faction)
+            if code is None:
+                return np.zeros_like(mask)
+            mask &= self.faction[: self.size] == code
+        return mask
+
+    def mark_dead(self, slots):
+        if len(slots) == 0:
+            return
+        for code, deaths in enumerate(np.bincount(self.faction[slots])):
+            if deaths:
+                self.live_counts[code] -= int(deaths)
+        self.pending_deaths.extend(int(slot) for slot in slots)
+
+    def take_pending_deaths(self):
+        pending = self.pending_deaths
+        self.pending_deaths = []
+        return pending
+
+    def count(self, faction=None):
+        if faction is None:
+            return sum(self.live_counts.values())
+        return self.live_counts.get(self.factions.get(faction), 0)
+
+    def placed_slots(self, faction=None):
+        return np.flatnonzero(self.living(faction) & (self.x[: self.size] >= 0))
+
+    def positions(self, slots):
+        return np.column_stack((self.x[slots], self.y[slots]))
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name, _ in COLUMNS)
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "slots_used": self.size - 1 - len(self.free),
+            "free_slots": len(self.free),
+            "bytes_per_agent": self.nbytes() / self.capacity,
+        }
+
+
+def column_property(name, cast):
+    def getter(self):
+        return cast(getattr(self._store, name)[self._slot])
+
+    def setter(self, value):
+        getattr(self._store, name)[self._slot] = value
+
+    return property(getter, setter)
+
+
+def position_property(x_name, y_name):
+    def getter(self):
+        x = getattr(self._store, x_name).item(self._slot)
+        if x < 0:
+            return None
+        return x, getattr(self._store, y_name).item(self._slot)
+
+    def setter(self, value):
+        if value is None:
+            value = (-1, -1)
+        getattr(self._store, x_name)[self._slot] = value[0]
+        getattr(self._store, y_name)[self._slot] = value[1]
+
+    return property(getter, setter)
+
+
+def name_property(name, names):
+    def getter(self):
+        store = self._store
+        return getattr(store, names)[getattr(store, name).item(self._slot)]
+
+    return property(getter)
+
+
+def table_property(name):
+    def getter(self):
+        return getattr(self._store, name)[self._slot]
+
+    def setter(self, value):
+        getattr(self._store, name)[self._slot] = value
+
+    return property(getter, setter)
@@ -0,0 +1,266 @@
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .model import BattleOfZborowModel
+from .outcome_cache import DEFAULT_CACHE_PATH, OutcomeCache, params_hash
+from .scenarios import SCENARIOS, get_scenario
+
+
+MAP_PATH = os.path.join("assets", "map", "map.tmx")
+
+
+def run_battle(
+    scenario_id,
+    weather,
+    seed,
+    max_steps=3000,
+    map_path=MAP_PATH,
+    units_config=None,
+    unit_overrides=None,
+):
+    if units_config is None:
+        units_config = get_scenario(scenario_id)["units"]
+    started = time.perf_counter()
+
+    model = BattleOfZborowModel(
+        map_path,
+        units_config,
+        weather=weather,
+        seed=seed,
+        unit_overrides=unit_overrides,
+        quiet=True,
+    )
+    status = model.get_battle_status()
+    while status["status"] == "ongoing" and model.schedule.steps < max_steps:
+        model.step()
+        status = model.get_battle_status()
+
+    counts = model.get_faction_counts()
+    return {
+        "scenario_id": scenario_id,
+        "weather": weather,
+        "seed": seed,
+        "finished": status["status"] == "finished",
+        "winner": status.get("winner"),
+        "survivors": status.get("survivors"),
+        "crown_count": counts["crown_count"],
+        "cossack_count": counts["cossack_count"],
+        "steps": model.schedule.steps,
+        "wall_time": round(time.perf_counter() - started, 4),
+    }
+
+
+def run_batch(
+    scenario_id,
+    weather,
+    seeds,
+    workers=None,
+    max_steps=3000,
+    map_path=MAP_PATH,
+    on_result=None,
+    cache=None,
+):
+    units_config = get_scenario(scenario_id)["units"]
+    params = params_hash(units_config, None, max_steps, map_path) if cache else None
+    results = []
+
+    def collect(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    missing = []
+    for seed in seeds:
+        result = cache.get(scenario_id, weather, seed, params) if cache else None
+        if result is None:
+            missing.append(seed)
+        else:
+            collect(result)
+
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    run_battle, scenario_id, weather, seed, max_steps, map_path
+                )
+                for seed in missing
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if cache:
+                    cache.put(scenario_id, weather, result["seed"], params, result)
+                collect(result)
+    return results
+
+
+class JobLimitError(RuntimeError):
+    pass
+
+
+class OutcomeJobs:
+    def __init__(self, cache, workers=2, max_pending=16, max_jobs=256):
+        self.cache = cache
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.executor = None
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.by_key = {}
+
+    def submit(self, scenario_id, weather, seed, max_steps, map_path, units_config):
+        params = params_hash(units_config, None, max_steps, map_path)
+        key = (scenario_id, weather, seed, params)
+        result = self.cache.get(*key)
+        if result is not None:
+            return None, result
+
+        with self.lock:
+            job_id = self.by_key.get(key)
+            if job_id is not None:
+                future = self.jobs[job_id][1]
+                if not future.done() or future.exception() is None:
+                    return job_id, None
+
+            pending = sum(1 for _, f in self.jobs.values() if not f.done())
+            if pending >= self.max_pending:
+                raise JobLimitError("Zbyt wiele oczekujących symulacji")
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            future = self.executor.submit(
+                run_battle,
+                scenario_id,
+                weather,
+                seed,
+                max_steps,
+                map_path,
+                units_config,
+            )
+            future.add_done_callback(lambda f: self._store(key, f))
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = (key, future)
+            self.by_key[key] = job_id
+            self._trim()
+        return job_id, None
+
+    def _store(self, key, future):
+        error = future.exception()
+        if error is None:
+            self.cache.put(*key, future.result())
+        elif isinstance(error, BrokenProcessPool):
+            with self.lock:
+                self.executor = None
+
+    def _trim(self):
+        while len(self.jobs) > self.max_jobs:
+            job_id, (key, future) = next(iter(self.jobs.items()))
+            if not future.done():
+                break
+            del self.jobs[job_id]
+            if self.by_key.get(key) == job_id:
+                del self.by_key[key]
+
+    def status(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        _, future = job
+        if not future.done():
+            return {"job_id": job_id, "status": "pending"}
+        if future.exception() is not None:
+            error = str(future.exception())
+            return {"job_id": job_id, "status": "error", "error": error}
+        result = dict(future.result())
+        result["cached"] = False
+        return {"job_id": job_id, "status": "done", "result": result}
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def summarize(results):
+    wins = {}
+    for result in results:
+        winner = result["winner"] or "Nierozstrzygnięta"
+        wins[winner] = wins.get(winner, 0) + 1
+    total = len(results)
+    return {
+        "runs": total,
+        "wins": wins,
+        "win_rates": {k: v / total for k, v in wins.items()} if total else {},
+        "mean_steps": sum(r["steps"] for r in results) / total if total else 0,
+        "mean_wall_time": sum(r["wall_time"] for r in results) / total if total else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Uruchamia serię bitew bez interfejsu (pula procesów)."
+    )
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--weather", default="clear", choices=["clear", "rain", "fog"])
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-steps", type=int, default=3000)
+    parser.add_argument("--map", default=MAP_PATH)
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument(
+        "--output",
+        help="Plik JSONL z wynikami (domyślnie batch_<scenariusz>_<pogoda>.jsonl)",
+    )
+    args = parser.parse_args()
+
+    output = args.output or f"batch_{args.scenario}_{args.weather}.jsonl"
+    seeds = range(args.first_seed, args.first_seed + args.runs)
+    print(
+        f"Scenariusz {args.scenario}, pogoda {args.weather}, "
+        f"{args.runs} bitew, {args.workers} procesów -> {output}"
+    )
+
+    cache = None if args.no_cache else OutcomeCache(args.cache)
+
+    started = time.perf_counter()
+    with open(output, "a", encoding="utf-8") as f:
+
+        def write_result(result):
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            f.flush()
+
+        results = run_batch(
+            args.scenario,
+            args.weather,
+            seeds,
+            workers=args.workers,
+            max_steps=args.max_steps,
+            map_path=args.map,
+            on_result=write_result,
+            cache=cache,
+        )
+
+    summary = summarize(results)
+    print(f"Zakończono w {time.perf_counter() - started:.1f} s")
+    for winner, rate in sorted(summary["win_rates"].items()):
+        print(f"  {winner}: {summary['wins'][winner]} ({rate:.1%})")
+    print(f"  Średnio kroków: {summary['mean_steps']:.1f}")
+    if cache:
+        stats = cache.stats()
+        print(f"  Z pamięci podręcznej: {stats['hits']} z {len(results)}")
+
+
+if __name__ == "__main__":
+    main()
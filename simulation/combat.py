@@ -0,0 +1,101 @@
+import numpy as np
+
+
+class CombatResolver:
+    def __init__(
+        self,
+        model,
+        cover_factor=0.6,
+        ordering_passes=4,
+    ):
+        self.model = model
+        self.cover_factor = cover_factor
+        self.ordering_passes = ordering_passes
+        self.rng = np.random.default_rng(model.random.getrandbits(64))
+
+        self.attackers = []
+        self.targets = []
+        self.damage = []
+        self.ranged = []
+
+        self.resolved_attacks = 0
+        self.dropped_attacks = 0
+        self.kills = 0
+
+    def queue_attack(self, attacker, target, damage, ranged=False):
+        self.attackers.append(attacker.slot)
+        self.targets.append(target.slot)
+        self.damage.append(damage)
+        self.ranged.append(ranged)
+
+    def _surviving_intents(self, attackers, targets, actual, hp):
+        order = np.arange(targets.size)
+        by_target = np.lexsort((order, targets))
+        grouped = targets[by_target]
+        starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+        lengths = np.diff(np.r_[starts, grouped.size])
+
+        valid = np.ones(targets.size, dtype=bool)
+        for _ in range(self.ordering_passes):
+            dealt = np.where(valid, actual, 0.0)[by_target]
+            running = np.cumsum(dealt)
+            running -= np.repeat(running[starts] - dealt[starts], lengths)
+            lethal = running >= hp[grouped]
+
+            death_at = np.full(hp.size, targets.size)
+            np.minimum.at(death_at, grouped[lethal], by_target[lethal])
+            updated = death_at[attackers] > order
+            if np.array_equal(updated, valid):
+                break
+            valid = updated
+        return valid
+
+    def resolve(self):
+        if not self.targets:
+            return np.empty(0, dtype=np.intp)
+
+        store = self.model.agent_store
+        attackers = np.array(self.attackers, dtype=np.intp)
+        targets = np.array(self.targets, dtype=np.intp)
+        amount = np.array(self.damage, dtype=np.float64)
+        ranged = np.array(self.ranged, dtype=bool)
+        self.attackers, self.targets, self.damage, self.ranged = [], [], [], []
+
+        covered = ranged & self.model.cover_mask[store.y[targets], store.x[targets]]
+        amount = np.where(covered, amount * self.cover_factor, amount)
+
+        reduction = self.rng.integers(0, store.defense[targets] // 2 + 1)
+        reduction = np.minimum(amount - 1, reduction)
+        actual = np.maximum(1, amount - reduction)
+
+        hp = store.hp[: store.size]
+        valid = self._surviving_intents(attackers, targets, actual, hp)
+        valid &= hp[targets] > 0
+        self.dropped_attacks += int(targets.size - np.count_nonzero(valid))
+        targets, actual = targets[valid], actual[valid]
+        if targets.size == 0:
+            return np.empty(0, dtype=np.intp)
+
+        morale_loss = actual * 1.5
+        morale_loss[store.discipline[targets] > 80] *= 0.7
+
+        hit, inverse = np.unique(targets, return_inverse=True)
+        total_damage = np.bincount(inverse, weights=actual)
+        total_morale = np.bincount(inverse, weights=morale_loss)
+
+        store.hp[hit] = np.maximum(0, store.hp[hit] - total_damage)
+        store.morale[hit] = np.maximum(0, store.morale[hit] - total_morale)
+
+        killed = hit[store.hp[hit] <= 0]
+        store.mark_dead(killed)
+        self.resolved_attacks += int(targets.size)
+        self.kills += int(killed.size)
+        self.model.panic.record_slots(killed, "death")
+        return killed
+
+    def stats(self):
+        return {
+            "resolved_attacks": self.resolved_attacks,
+            "dropped_attacks": self.dropped_attacks,
+            "kills": self.kills,
+        }
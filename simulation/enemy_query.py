@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class NearestEnemyService:
+    def __init__(self, model, chunk_elements=1_000_000):
+        self.model = model
+        self.chunk_elements = chunk_elements
+        self.tick = None
+        self.nearest_tick = None
+        self.by_faction = {}
+        self.nearest = {}
+
+        self.batches = 0
+        self.cached_hits = 0
+        self.single_queries = 0
+
+    def invalidate(self):
+        self.tick = None
+        self.nearest_tick = None
+
+    def _refresh(self):
+        tick = self.model.schedule.steps
+        if self.tick == tick:
+            return
+        self.tick = tick
+        self.nearest_tick = None
+
+        store = self.model.agent_store
+        self.by_faction = {}
+        for faction in store.factions:
+            slots = store.placed_slots(faction)
+            if slots.size:
+                self.by_faction[faction] = (
+                    [store.agents[slot] for slot in slots],
+                    store.positions(slots).astype(np.int32),
+                )
+
+    def _refresh_nearest(self):
+        self._refresh()
+        if self.nearest_tick == self.tick:
+            return
+        self.nearest_tick = self.tick
+        self.nearest = {}
+        self.batches += 1
+
+        for faction, (agents, positions) in self.by_faction.items():
+            enemies, enemy_positions = self._enemies_of(faction)
+            if not enemies:
+                for agent in agents:
+                    self.nearest[agent.unique_id] = None
+                continue
+            rows = max(1, self.chunk_elements // len(enemies))
+            for start in range(0, len(agents), rows):
+                chunk = positions[start : start + rows]
+                dist = np.abs(chunk[:, None, :] - enemy_positions[None, :, :]).max(
+                    axis=2
+                )
+                best = dist.argmin(axis=1)
+                for agent, idx in zip(agents[start : start + rows], best):
+                    self.nearest[agent.unique_id] = enemies[idx]
+
+    def _enemies_of(self, faction):
+        agents = []
+        positions = []
+        for other, (group, group_positions) in self.by_faction.items():
+            if other != faction:
+                agents.extend(group)
+                positions.append(group_positions)
+        if not agents:
+            return [], np.empty((0, 2), dtype=np.int32)
+        return agents, np.concatenate(positions)
+
+    def positions(self, exclude_faction):
+        self._refresh()
+        _, positions = self._enemies_of(exclude_faction)
+        return positions
+
+    def nearest_enemy(self, agent):
+        self._refresh_nearest()
+        enemy = self.nearest.get(agent.unique_id)
+        if enemy is not None and enemy.hp > 0:
+            self.cached_hits += 1
+            return enemy
+        if agent.unique_id in self.nearest and enemy is None:
+            self.cached_hits += 1
+            return None
+
+        self.single_queries += 1
+        enemies, _ = self._enemies_of(agent.faction)
+        alive = [e for e in enemies if e.hp > 0 and e.pos is not None]
+        if not alive:
+            enemy = None
+        else:
+            positions = np.array([e.pos for e in alive], dtype=np.int32)
+            dist = np.abs(positions - np.array(agent.pos, dtype=np.int32)).max(axis=1)
+            enemy = alive[int(dist.argmin())]
+        self.nearest[agent.unique_id] = enemy
+        return enemy
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "cached_hits": self.cached_hits,
+            "single_queries": self.single_queries,
+        }
@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+
+
+NEIGHBOR_OFFSETS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+def prefix_sums(costs):
+    costs = np.asarray(costs, dtype=np.float64)
+    rows = np.cumsum(costs, axis=1)
+    cols = np.cumsum(costs, axis=0)
+    return rows - costs, rows[:, -1:] - rows, cols - costs, cols[-1:] - cols
+
+
+class FlowField:
+    def __init__(self, costs, goals, sums=None):
+        self.height, self.width = costs.shape
+        self.costs = costs.ravel()
+        dist = np.full((self.height, self.width), math.inf)
+        for x, y in goals:
+            if 0 <= x < self.width and 0 <= y < self.height:
+                dist[y, x] = 0.0
+        self.goal_count = int(np.count_nonzero(dist == 0))
+        self.sweeps = 0
+        if self.goal_count:
+            dist = self._sweep(dist, sums if sums is not None else prefix_sums(costs))
+        self.dist = dist.ravel()
+
+    def _sweep(self, dist, sums):
+        # Stepping into a cell costs that cell's terrain cost, so along one row
+        # the cost-to-go is a min-plus prefix scan that np.minimum.accumulate
+        # runs for every row at once. Sweeping the four axis directions until
+        # nothing improves converges in about one round per turn in a path.
+        before_x, after_x, before_y, after_y = sums
+        minimum = np.minimum
+        accumulate = np.minimum.accumulate
+        while True:
+            self.sweeps += 1
+            previous = dist
+            dist = minimum(dist, before_x + accumulate(dist - before_x, axis=1))
+            dist = minimum(
+                dist, after_x + accumulate((dist - after_x)[:, ::-1], axis=1)[:, ::-1]
+            )
+            dist = minimum(dist, before_y + accumulate(dist - before_y, axis=0))
+            dist = minimum(
+                dist, after_y + accumulate((dist - after_y)[::-1], axis=0)[::-1]
+            )
+            if not (dist < previous - 1e-9).any():
+                return dist
+
+    def distance(self, pos):
+        x, y = pos
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return math.inf
+        return self.dist.item(y * self.width + x)
+
+    def next_step(self, pos, is_free=None):
+        current = self.distance(pos)
+        if current == 0 or current == math.inf:
+            return None
+
+        # Rank by the cost of entering the neighbour plus its cost-to-go; the
+        # cost-to-go alone favours walking through walls towards the goal.
+        best = None
+        best_total = math.inf
+        x, y = pos
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.width and 0 <= ny < self.height):
+                continue
+            idx = ny * self.width + nx
+            d = self.dist.item(idx)
+            if d >= current:
+                continue
+            total = d + self.costs.item(idx)
+            if total >= best_total:
+                continue
+            if is_free is not None and not is_free((nx, ny)):
+                continue
+            best = (nx, ny)
+            best_total = total
+        return best
+
+    def side_step(self, pos, is_free):
+        current = self.distance(pos)
+        if current == 0 or current == math.inf:
+            return None
+
+        x, y = pos
+        for dx, dy in NEIGHBOR_OFFSETS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.width and 0 <= ny < self.height):
+                continue
+            if self.dist.item(ny * self.width + nx) == current and is_free((nx, ny)):
+                return (nx, ny)
+        return None
+
+    def descent(self, pos, length=6):
+        # The route next_step would take if no cell were occupied.
+        path = []
+        step = self.next_step(pos)
+        while step is not None and len(path) < length:
+            path.append(step)
+            step = self.next_step(step)
+        return path
+
+
+class FlowFieldCache:
+    def __init__(self, terrain_costs, max_age=4):
+        self.costs = terrain_costs
+        self.sums = prefix_sums(terrain_costs)
+        self.max_age = max_age
+        self.tick = 0
+        self.fields = {}
+        self.built = {}
+        self.hits = 0
+        self.misses = 0
+        self.sweeps = 0
+
+    def new_tick(self):
+        # Goals move at most one cell per tick and the units reading the field
+        # have no enemy within sight, so a field stays usable for a few ticks.
+        self.tick += 1
+        for key in list(self.fields):
+            if self.tick - self.built[key] >= self.max_age:
+                del self.fields[key]
+                del self.built[key]
+
+    def get_field(self, key, goals):
+        field = self.fields.get(key)
+        if field is None:
+            self.misses += 1
+            if callable(goals):
+                goals = goals()
+            field = FlowField(self.costs, goals, self.sums)
+            self.sweeps += field.sweeps
+            self.fields[key] = field
+            self.built[key] = self.tick
+        else:
+            self.hits += 1
+        return field
+
+    def nbytes(self):
+        return sum(a.nbytes for a in self.sums) + sum(
+            f.dist.nbytes for f in self.fields.values()
+        )
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "max_age": self.max_age,
+            "live_fields": len(self.fields),
+            "sweeps": self.sweeps,
+        }
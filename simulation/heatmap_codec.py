@@ -0,0 +1,42 @@
+import base64
+import zlib
+
+import numpy as np
+
+
+HEATMAP_ENCODING = "zlib-int32"
+
+
+def _pack(grid):
+    raw = np.ascontiguousarray(grid, dtype="<i4").tobytes()
+    return base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+
+
+def _unpack(blob, width, height):
+    raw = zlib.decompress(base64.b64decode(blob))
+    return np.frombuffer(raw, dtype="<i4").reshape(height, width)
+
+
+def encode_heatmap(crown, cossack):
+    height, width = crown.shape
+    return {
+        "encoding": HEATMAP_ENCODING,
+        "width": width,
+        "height": height,
+        "crown": _pack(crown),
+        "cossack": _pack(cossack),
+    }
+
+
+def decode_heatmap(heatmap_data):
+    if not heatmap_data or heatmap_data.get("encoding") != HEATMAP_ENCODING:
+        return heatmap_data
+
+    width = heatmap_data["width"]
+    height = heatmap_data["height"]
+    return {
+        "width": width,
+        "height": height,
+        "crown": _unpack(heatmap_data["crown"], width, height).tolist(),
+        "cossack": _unpack(heatmap_data["cossack"], width, height).tolist(),
+    }
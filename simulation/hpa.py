@@ -0,0 +1,268 @@
+import heapq
+import math
+
+import numpy as np
+
+
+ORTHOGONAL_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+class HierarchicalPlanner:
+    def __init__(self, terrain_costs, cluster_size=10, cheap_cost=5.0):
+        self.height, self.width = terrain_costs.shape
+        self.cluster_size = cluster_size
+        self.cheap_cost = cheap_cost
+        self.clusters_x = math.ceil(self.width / cluster_size)
+        self.clusters_y = math.ceil(self.height / cluster_size)
+
+        self.terrain_costs = terrain_costs.copy()
+        self.costs = terrain_costs.ravel().tolist()
+        self.min_cost = float(terrain_costs[terrain_costs > 0].min())
+
+        self.cluster_nodes = {}
+        self.inter_edges = {}
+        self.intra_edges = {}
+
+        self.plans = 0
+        self.direct_plans = 0
+        self.abstract_expanded = 0
+        self.cluster_rebuilds = 0
+
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                if cx + 1 < self.clusters_x:
+                    self._build_border((cx, cy), (cx + 1, cy))
+                if cy + 1 < self.clusters_y:
+                    self._build_border((cx, cy), (cx, cy + 1))
+
+    def cluster_of(self, idx):
+        return (
+            (idx % self.width) // self.cluster_size,
+            (idx // self.width) // self.cluster_size,
+        )
+
+    def _cluster_bounds(self, cluster):
+        cx, cy = cluster
+        x0, y0 = cx * self.cluster_size, cy * self.cluster_size
+        return (
+            x0,
+            y0,
+            min(self.width, x0 + self.cluster_size),
+            min(self.height, y0 + self.cluster_size),
+        )
+
+    def _border_pairs(self, cluster_a, cluster_b):
+        ax0, ay0, ax1, ay1 = self._cluster_bounds(cluster_a)
+        if cluster_b[0] > cluster_a[0]:
+            x = ax1 - 1
+            return [
+                (y * self.width + x, y * self.width + x + 1) for y in range(ay0, ay1)
+            ]
+        y = ay1 - 1
+        return [
+            (y * self.width + x, (y + 1) * self.width + x) for x in range(ax0, ax1)
+        ]
+
+    def _build_border(self, cluster_a, cluster_b):
+        costs = self.costs
+        pairs = self._border_pairs(cluster_a, cluster_b)
+        passable = [
+            0 < costs[a] < self.cheap_cost and 0 < costs[b] < self.cheap_cost
+            for a, b in pairs
+        ]
+
+        transitions = []
+        start = None
+        for i, ok in enumerate(passable + [False]):
+            if ok and start is None:
+                start = i
+            elif not ok and start is not None:
+                length = i - start
+                if length >= 6:
+                    transitions.extend([pairs[start], pairs[i - 1]])
+                else:
+                    transitions.append(pairs[start + length // 2])
+                start = None
+
+        if not transitions:
+            walkable = [p for p in pairs if costs[p[0]] > 0 and costs[p[1]] > 0]
+            if walkable:
+                transitions.append(
+                    min(walkable, key=lambda p: costs[p[0]] + costs[p[1]])
+                )
+
+        for a, b in transitions:
+            self.cluster_nodes.setdefault(cluster_a, set()).add(a)
+            self.cluster_nodes.setdefault(cluster_b, set()).add(b)
+            self.inter_edges.setdefault(a, {})[b] = costs[b]
+            self.inter_edges.setdefault(b, {})[a] = costs[a]
+
+    def _remove_border(self, cluster_a, cluster_b):
+        for a, b in self._border_pairs(cluster_a, cluster_b):
+            for u, v, cluster in ((a, b, cluster_a), (b, a, cluster_b)):
+                edges = self.inter_edges.get(u)
+                if edges and v in edges:
+                    del edges[v]
+                    if not edges:
+                        del self.inter_edges[u]
+                        self.cluster_nodes.get(cluster, set()).discard(u)
+
+    def _cluster_dijkstra(self, source, cluster, reverse=False):
+        x0, y0, x1, y1 = self._cluster_bounds(cluster)
+        width = self.width
+        costs = self.costs
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        done = set()
+
+        while heap:
+            d, idx = heapq.heappop(heap)
+            if idx in done:
+                continue
+            done.add(idx)
+            x, y = idx % width, idx // width
+            for dx, dy in ORTHOGONAL_STEPS:
+                nx, ny = x + dx, y + dy
+                if not (x0 <= nx < x1 and y0 <= ny < y1):
+                    continue
+                n_idx = ny * width + nx
+                step = costs[idx] if reverse else costs[n_idx]
+                if step <= 0 or costs[n_idx] <= 0:
+                    continue
+                nd = d + step
+                if nd < dist.get(n_idx, math.inf):
+                    dist[n_idx] = nd
+                    heapq.heappush(heap, (nd, n_idx))
+        return dist
+
+    def _intra(self, node):
+        edges = self.intra_edges.get(node)
+        if edges is None:
+            cluster = self.cluster_of(node)
+            dist = self._cluster_dijkstra(node, cluster)
+            edges = {
+                other: dist[other]
+                for other in self.cluster_nodes.get(cluster, ())
+                if other != node and other in dist
+            }
+            self.intra_edges[node] = edges
+        return edges
+
+    def plan(self, start, goal):
+        self.plans += 1
+        width = self.width
+        sx, sy = start
+        gx, gy = goal
+        if max(abs(sx - gx), abs(sy - gy)) < 2 * self.cluster_size:
+            self.direct_plans += 1
+            return [goal]
+
+        start_idx = sy * width + sx
+        goal_idx = gy * width + gx
+        start_cluster = self.cluster_of(start_idx)
+        goal_cluster = self.cluster_of(goal_idx)
+
+        from_start = self._cluster_dijkstra(start_idx, start_cluster)
+        to_goal = self._cluster_dijkstra(goal_idx, goal_cluster, reverse=True)
+        goal_links = {
+            node: to_goal[node]
+            for node in self.cluster_nodes.get(goal_cluster, ())
+            if node in to_goal
+        }
+
+        def heuristic(idx):
+            return (abs(idx % width - gx) + abs(idx // width - gy)) * self.min_cost
+
+        g_score = {start_idx: 0.0}
+        parent = {start_idx: None}
+        heap = [(heuristic(start_idx), start_idx)]
+        closed = set()
+
+        while heap:
+            _, idx = heapq.heappop(heap)
+            if idx == goal_idx:
+                break
+            if idx in closed:
+                continue
+            closed.add(idx)
+            self.abstract_expanded += 1
+
+            if idx == start_idx:
+                neighbors = {
+                    node: from_start[node]
+                    for node in self.cluster_nodes.get(start_cluster, ())
+                    if node in from_start and node != start_idx
+                }
+            else:
+                neighbors = dict(self._intra(idx))
+            neighbors.update(self.inter_edges.get(idx, {}))
+            if idx in goal_links:
+                neighbors[goal_idx] = goal_links[idx]
+
+            g = g_score[idx]
+            for n_idx, cost in neighbors.items():
+                ng = g + cost
+                if ng < g_score.get(n_idx, math.inf):
+                    g_score[n_idx] = ng
+                    parent[n_idx] = idx
+                    heapq.heappush(heap, (ng + heuristic(n_idx), n_idx))
+        else:
+            self.direct_plans += 1
+            return [goal]
+
+        nodes = []
+        idx = goal_idx
+        while idx is not None and idx != start_idx:
+            nodes.append(idx)
+            idx = parent[idx]
+        nodes.reverse()
+
+        waypoints = []
+        previous_cluster = start_cluster
+        for node in nodes:
+            cluster = self.cluster_of(node)
+            if node == goal_idx or cluster != previous_cluster:
+                waypoints.append((node % width, node // width))
+            previous_cluster = cluster
+        return waypoints
+
+    def update_costs(self, terrain_costs):
+        changed = np.argwhere(terrain_costs != self.terrain_costs)
+        self.terrain_costs = terrain_costs.copy()
+        self.costs = terrain_costs.ravel().tolist()
+        self.min_cost = float(terrain_costs[terrain_costs > 0].min())
+        if changed.size == 0:
+            return
+
+        touched = {
+            (int(x) // self.cluster_size, int(y) // self.cluster_size)
+            for y, x in changed
+        }
+        borders = set()
+        for cx, cy in touched:
+            for nx, ny in ((cx - 1, cy), (cx + 1, cy), (cx, cy - 1), (cx, cy + 1)):
+                if 0 <= nx < self.clusters_x and 0 <= ny < self.clusters_y:
+                    borders.add(tuple(sorted(((cx, cy), (nx, ny)))))
+
+        for cluster_a, cluster_b in borders:
+            self._remove_border(cluster_a, cluster_b)
+        for cluster_a, cluster_b in borders:
+            self._build_border(cluster_a, cluster_b)
+
+        stale = touched | {c for border in borders for c in border}
+        self.intra_edges = {
+            node: edges
+            for node, edges in self.intra_edges.items()
+            if self.cluster_of(node) not in stale
+        }
+        self.cluster_rebuilds += len(stale)
+
+    def stats(self):
+        return {
+            "clusters": self.clusters_x * self.clusters_y,
+            "entrances": sum(len(nodes) for nodes in self.cluster_nodes.values()),
+            "plans": self.plans,
+            "direct_plans": self.direct_plans,
+            "abstract_expanded": self.abstract_expanded,
+            "cluster_rebuilds": self.cluster_rebuilds,
+        }
@@ -0,0 +1,155 @@
+import os
+import threading
+
+import numpy as np
+import pytmx
+
+from .flow_field import FlowField
+from .map_bundle import load_map_bundle
+
+
+HEALING_CENTERS = (
+    (73, 24),
+    (126, 24),
+    (127, 41),
+    (127, 52),
+    (99, 68),
+    (127, 67),
+)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+class MapAssets:
+    def __init__(self, path, weather="clear", base=None):
+        self.path = path
+        self.weather = weather
+
+        if base is None:
+            self.map_bundle = load_map_bundle(path)
+            if self.map_bundle is not None:
+                self.map_data = None
+                self.width = self.map_bundle.width
+                self.height = self.map_bundle.height
+                self.base_terrain_costs = self.map_bundle.movement_cost
+                self.entry_mask = self.map_bundle.healing_entry
+            else:
+                self.map_data = pytmx.TiledMap(path)
+                self.width = self.map_data.width
+                self.height = self.map_data.height
+                self.load_tile_layers()
+            self.healing_centers = HEALING_CENTERS
+            self.build_healing_layers()
+        else:
+            for name in (
+                "map_bundle",
+                "map_data",
+                "width",
+                "height",
+                "healing_centers",
+                "base_terrain_costs",
+                "entry_mask",
+                "healing_center_id",
+                "healing_mask",
+                "healing_center_index",
+                "healing_tiles",
+                "healing_entrances",
+            ):
+                setattr(self, name, getattr(base, name))
+
+        self.apply_weather()
+        self.build_flee_fields()
+
+    def load_tile_layers(self):
+        costs = np.ones((self.height, self.width), dtype=np.float32)
+        entry_mask = np.zeros((self.height, self.width), dtype=bool)
+        try:
+            terrain_layer = self.map_data.get_layer_by_name("Teren")
+            if terrain_layer:
+                for x, y, gid in terrain_layer.iter_data():
+                    if gid != 0:
+                        props = self.map_data.get_tile_properties_by_gid(gid)
+                        if not props:
+                            continue
+                        if "movement_cost" in props:
+                            costs[y, x] = props["movement_cost"]
+                        if props.get("healing_zone_entry"):
+                            entry_mask[y, x] = True
+        except Exception as e:
+            print(f"Błąd ładowania terenu: {e}. Używam domyślnych kosztów.")
+        self.base_terrain_costs = _frozen(costs)
+        self.entry_mask = _frozen(entry_mask)
+
+    def build_healing_layers(self):
+        center_id = np.full((self.height, self.width), -1, dtype=np.int8)
+        for i, (cx, cy) in reversed(list(enumerate(self.healing_centers))):
+            center_id[
+                max(0, cy - 1) : min(self.height, cy + 2),
+                max(0, cx - 1) : min(self.width, cx + 2),
+            ] = i
+        self.healing_center_id = _frozen(center_id)
+        self.healing_mask = _frozen(center_id >= 0)
+        self.healing_center_index = {
+            center: i for i, center in enumerate(self.healing_centers)
+        }
+        self.healing_tiles = [
+            (int(x), int(y)) for y, x in np.argwhere(self.healing_mask)
+        ]
+
+        found_entrances = [(int(x), int(y)) for y, x in np.argwhere(self.entry_mask)]
+        self.healing_entrances = {}
+        for center in self.healing_centers:
+            entrance = (center[0], center[1] + 1)
+            if found_entrances:
+                closest = min(found_entrances, key=lambda e: max(abs(e[0]-center[0]), abs(e[1]-center[1])))
+                if max(abs(closest[0]-center[0]), abs(closest[1]-center[1])) <= 2:
+                    entrance = closest
+            self.healing_entrances[center] = entrance
+
+    def apply_weather(self):
+        costs = self.base_terrain_costs
+        if self.weather == "rain":
+            costs = np.where(costs == 1.5, costs * 2.5, costs)
+        self.terrain_costs = _frozen(costs.astype(np.float32))
+        self.cover_mask = _frozen(self.terrain_costs > 1.5)
+        self.impassable_mask = _frozen(self.terrain_costs >= 5)
+        self.spawn_valid = _frozen(~self.impassable_mask)
+
+    def build_flee_fields(self):
+        costs = self.terrain_costs
+        edges = [(x, y) for x in range(self.width) for y in (0, self.height - 1)]
+        edges += [(x, y) for y in range(1, self.height - 1) for x in (0, self.width - 1)]
+        self.edge_field = FlowField(costs, edges)
+        self.healing_fields = {
+            center: FlowField(costs, [entrance])
+            for center, entrance in self.healing_entrances.items()
+        }
+
+
+def load_map_assets(path, weather="clear"):
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    key = (path, mtime, weather)
+    with _cache_lock:
+        assets = _cache.get(key)
+        if assets is None:
+            for stale in [k for k in _cache if k[0] == path and k[1] != mtime]:
+                del _cache[stale]
+            base = next(
+                (a for k, a in _cache.items() if k[0] == path and k[1] == mtime),
+                None,
+            )
+            assets = MapAssets(path, weather, base)
+            _cache[key] = assets
+    return assets
+
+
+def clear_map_assets():
+    with _cache_lock:
+        _cache.clear()
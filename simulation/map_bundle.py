@@ -0,0 +1,191 @@
+import argparse
+import glob
+import json
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+
+BUNDLE_VERSION = 1
+GID_MASK = 0x1FFFFFFF
+FLIPPED_HORIZONTALLY = 0x80000000
+FLIPPED_VERTICALLY = 0x40000000
+FLIPPED_DIAGONALLY = 0x20000000
+
+
+def bundle_path(tmx_path):
+    return os.path.splitext(tmx_path)[0] + ".bundle"
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
+
+
+def _tileset_sources(root):
+    return [ts.get("source") for ts in root.findall("tileset") if ts.get("source")]
+
+
+def map_sources(tmx_path):
+    tmx_path = os.path.abspath(tmx_path)
+    map_dir = os.path.dirname(tmx_path)
+    root = ET.parse(tmx_path).getroot()
+    sources = {os.path.basename(tmx_path): tmx_path}
+    for source in _tileset_sources(root):
+        sources[source] = os.path.normpath(os.path.join(map_dir, source))
+    return sources
+
+
+def _read_raw_layer(tmx_path, layer_name):
+    root = ET.parse(tmx_path).getroot()
+    for layer in root.findall("layer"):
+        if layer.get("name") != layer_name:
+            continue
+        data = layer.find("data")
+        if data is None or data.get("encoding") != "csv":
+            raise ValueError(f"Warstwa '{layer_name}' nie jest zapisana jako CSV")
+        width = int(layer.get("width"))
+        height = int(layer.get("height"))
+        values = [int(v) for v in data.text.split(",") if v.strip()]
+        gids = np.zeros(width * height, dtype=np.uint32)
+        gids[: len(values)] = values[: width * height]
+        return gids.reshape(height, width)
+
+    raise ValueError(f"Nie znaleziono warstwy '{layer_name}'")
+
+
+def compile_map(tmx_path, layer_name="Teren"):
+    import pytmx
+
+    tmx_path = os.path.abspath(tmx_path)
+    map_data = pytmx.TiledMap(tmx_path)
+    width, height = map_data.width, map_data.height
+
+    gids = _read_raw_layer(tmx_path, layer_name)
+    flips = (
+        ((gids & FLIPPED_HORIZONTALLY) != 0) * 4
+        + ((gids & FLIPPED_VERTICALLY) != 0) * 2
+        + ((gids & FLIPPED_DIAGONALLY) != 0)
+    ).astype(np.uint8)
+
+    costs = np.ones((height, width), dtype=np.float32)
+    healing_entry = np.zeros((height, width), dtype=bool)
+    terrain_layer = map_data.get_layer_by_name(layer_name)
+    for x, y, gid in terrain_layer.iter_data():
+        if gid != 0:
+            props = map_data.get_tile_properties_by_gid(gid)
+            if not props:
+                continue
+            if "movement_cost" in props:
+                costs[y, x] = props["movement_cost"]
+            if props.get("healing_zone_entry"):
+                healing_entry[y, x] = True
+
+    tilesets = []
+    for tileset in map_data.tilesets:
+        tilesets.append(
+            {
+                "firstgid": tileset.firstgid,
+                "image": os.path.basename(tileset.source or ""),
+                "tilewidth": tileset.tilewidth,
+                "tileheight": tileset.tileheight,
+                "spacing": tileset.spacing or 0,
+                "margin": tileset.margin or 0,
+                "columns": tileset.columns,
+            }
+        )
+
+    sources = {
+        name: _source_stamp(path) for name, path in map_sources(tmx_path).items()
+    }
+
+    out_dir = bundle_path(tmx_path)
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "gids.npy"), gids)
+    np.save(os.path.join(out_dir, "flips.npy"), flips)
+    np.save(os.path.join(out_dir, "movement_cost.npy"), costs)
+    np.save(os.path.join(out_dir, "healing_entry.npy"), healing_entry)
+
+    meta = {
+        "version": BUNDLE_VERSION,
+        "layer": layer_name,
+        "width": width,
+        "height": height,
+        "tile_width": map_data.tilewidth,
+        "tile_height": map_data.tileheight,
+        "tilesets": tilesets,
+        "sources": sources,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return out_dir
+
+
+class MapBundle:
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.width = meta["width"]
+        self.height = meta["height"]
+        self.tile_width = meta["tile_width"]
+        self.tile_height = meta["tile_height"]
+        self.tilesets = meta["tilesets"]
+
+        self.gids = self._load("gids")
+        self.flips = self._load("flips")
+        self.movement_cost = self._load("movement_cost")
+        self.healing_entry = self._load("healing_entry")
+
+    def _load(self, name):
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+
+def is_bundle_fresh(tmx_path, meta):
+    if meta.get("version") != BUNDLE_VERSION:
+        return False
+    map_dir = os.path.dirname(os.path.abspath(tmx_path))
+    for name, stamp in meta.get("sources", {}).items():
+        source_path = os.path.normpath(os.path.join(map_dir, name))
+        if not os.path.exists(source_path):
+            return False
+        if _source_stamp(source_path) != stamp:
+            return False
+    return os.path.basename(tmx_path) in meta.get("sources", {})
+
+
+def load_map_bundle(tmx_path):
+    path = bundle_path(os.path.abspath(tmx_path))
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if not is_bundle_fresh(tmx_path, meta):
+            print(f"⚠️  Skompilowana mapa {path} jest nieaktualna, używam TMX.")
+            return None
+        return MapBundle(path, meta)
+    except Exception as e:
+        print(f"⚠️  Nie można wczytać skompilowanej mapy {path}: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Kompiluje mapy TMX do binarnego pakietu (.npy + meta.json)."
+    )
+    parser.add_argument(
+        "maps", nargs="*", help="Pliki .tmx (domyślnie assets/map/*.tmx)"
+    )
+    parser.add_argument("--layer", default="Teren")
+    args = parser.parse_args()
+
+    maps = args.maps or sorted(glob.glob(os.path.join("assets", "map", "*.tmx")))
+    for tmx_path in maps:
+        out_dir = compile_map(tmx_path, args.layer)
+        print(f"✓ {tmx_path} -> {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,308 +1,123 @@
 import mesa
-import pytmx
 import numpy as np
 from .agent import MilitaryAgent
-from pathfinding.core.grid import Grid
+from .agent_store import AgentStore, STATE_CODES
+from .combat import CombatResolver
+from .panic import PanicPropagator
+from .flow_field import FlowFieldCache
+from .map_assets import load_map_assets
+from .occupancy import OccupancyGrid
+from .pathing import PathEngine
+from .path_cache import PathCache
+from .hpa import HierarchicalPlanner
+from .path_scheduler import PathScheduler
+from .enemy_query import NearestEnemyService
+from .units import unit_types
 
 
 class BattleOfZborowModel(mesa.Model):
-    def __init__(self, map_file_path, units_config=None, weather="clear"):
+    def __init__(
+        self,
+        map_file_path,
+        units_config=None,
+        weather="clear",
+        path_budget=48,
+        path_budget_ms=None,
+        max_path_expansions=4000,
+        seed=None,
+        unit_overrides=None,
+        quiet=False,
+    ):
         super().__init__()
+        self.seed = self._seed
+        self.quiet = quiet
         self.weather = weather
         self.schedule = mesa.time.RandomActivation(self)
 
-        self.map_data = pytmx.TiledMap(map_file_path)
-        self.width = self.map_data.width
-        self.height = self.map_data.height
-
-        self.grid = mesa.space.MultiGrid(self.width, self.height, torus=False)
-
-        self.terrain_costs = np.array(self.load_terrain_data(), dtype=np.float32)
-
+        self.map_path = map_file_path
         self.apply_weather_effects()
 
-        self.path_grid = Grid(matrix=self.terrain_costs.tolist())
+        self.grid = OccupancyGrid(self.width, self.height, torus=False)
+        self.agent_store = AgentStore()
+        self.combat = CombatResolver(self)
+        self.panic = PanicPropagator(self)
+
+        self.path_engine = PathEngine(
+            self.terrain_costs, max_expanded=max_path_expansions
+        )
+        self.path_cache = PathCache()
+        self.hpa = HierarchicalPlanner(self.terrain_costs)
+        self.avoidance_stats = {"sidestep": 0, "detour": 0, "replan": 0}
+        self.path_scheduler = PathScheduler(
+            max_searches=path_budget,
+            max_ms=path_budget_ms,
+            search_counter=lambda: self.path_engine.searches,
+        )
+        self.flow_fields = FlowFieldCache(self.terrain_costs)
+        self.enemy_query = NearestEnemyService(self)
 
         self.heatmap_crown = np.zeros((self.height, self.width), dtype=int)
         self.heatmap_cossack = np.zeros((self.height, self.width), dtype=int)
 
         self.units_config = units_config if units_config else {}
 
-        self.healing_centers = [
-            (73, 24),
-            (126, 24),
-            (127, 41),
-            (127, 52),
-            (99, 68),
-            (127, 67),
-        ]
+        self.grid.set_zones(self.healing_center_id)
 
-        self.healing_tiles = []
-        for center in self.healing_centers:
-            cx, cy = center
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    x, y = cx + dx, cy + dy
-                    if 0 <= x < self.width and 0 <= y < self.height:
-                        self.healing_tiles.append((x, y))
-
-        self.find_healing_entrances()
-
-
-        self.unit_params = {
-            "Husaria": {
-                "hp": 150,
-                "morale": 140,
-                "discipline": 95,
-                "melee_damage": 100,
-                "ranged_damage": 0,
-                "range": 1,
-                "ammo": 0,
-                "defense": 8,
-                "speed": 6,
-                "rate_of_fire": 1.0,
-                "description": "Elitarna ciężka jazda przełamująca.",
-                "sprite_path": "assets/sprites/crown_cavalry.png",
-            },
-            "Pancerni": {
-                "hp": 120,
-                "morale": 110,
-                "discipline": 85,
-                "melee_damage": 70,
-                "ranged_damage": 0,
-                "range": 1,
-                "ammo": 0,
-                "defense": 5,
-                "speed": 7,
-                "rate_of_fire": 1.0,
-                "description": "Jazda średniozbrojna, uniwersalna.",
-                "sprite_path": "assets/sprites/pancerni.png",
-            },
-            "Rajtaria": {
-                "hp": 110,
-                "morale": 100,
-                "discipline": 90,
-                "melee_damage": 40,
-                "ranged_damage": 30,
-                "range": 3,
-                "ammo": 12,
-                "defense": 6,
-                "speed": 6,
-                "rate_of_fire": 0.8,
-                "description": "Ciężka jazda z bronią palną.",
-                "sprite_path": "assets/sprites/rajtaria.png",
-            },
-            "Dragonia": {
-                "hp": 100,
-                "morale": 95,
-                "discipline": 85,
-                "melee_damage": 30,
-                "ranged_damage": 25,
-                "range": 4,
-                "ammo": 15,
-                "defense": 4,
-                "speed": 5,
-                "rate_of_fire": 1.2,
-                "description": "Mobilna piechota konna.",
-                "sprite_path": "assets/sprites/crown_dragoon.png",
-            },
-            "Piechota Niemiecka": {
-                "hp": 110,
-                "morale": 100,
-                "discipline": 95,
-                "melee_damage": 25,
-                "ranged_damage": 35,
-                "range": 5,
-                "ammo": 20,
-                "defense": 6,
-                "speed": 3,
-                "rate_of_fire": 1.3,
-                "description": "Wysoka dyscyplina, silny ogień.",
-                "sprite_path": "assets/sprites/crown_infantry.png",
-            },
-            "Pospolite Ruszenie": {
-                "hp": 90,
-                "morale": 50,
-                "discipline": 20,
-                "melee_damage": 20,
-                "ranged_damage": 10,
-                "range": 2,
-                "ammo": 5,
-                "defense": 2,
-                "speed": 6,
-                "rate_of_fire": 0.8,
-                "description": "Niska dyscyplina, podatność na panikę.",
-                "sprite_path": "assets/sprites/crown_levy.png",
-            },
-            "Czeladz Obozowa": {
-                "hp": 60,
-                "morale": 90,
-                "discipline": 40,
-                "melee_damage": 25,
-                "ranged_damage": 0,
-                "range": 1,
-                "ammo": 0,
-                "defense": 0,
-                "speed": 5,
-                "rate_of_fire": 1.0,
-                "description": "Słabo uzbrojona, zdeterminowana.",
-                "sprite_path": "assets/sprites/crown_levy.png",
-            },
-            "Artyleria Koronna": {
-                "hp": 50,
-                "morale": 90,
-                "discipline": 90,
-                "melee_damage": 5,
-                "ranged_damage": 150,
-                "range": 15,
-                "ammo": 30,
-                "defense": 0,
-                "speed": 1,
-                "rate_of_fire": 0.25,
-                "description": "Potężna siła ognia, bardzo wolna.",
-                "sprite_path": "assets/sprites/armata.png",
-            },
-            "Jazda Tatarska": {
-                "hp": 85,
-                "morale": 80,
-                "discipline": 70,
-                "melee_damage": 30,
-                "ranged_damage": 15,
-                "range": 4,
-                "ammo": 40,
-                "defense": 1,
-                "speed": 9,
-                "rate_of_fire": 1.8,
-                "description": "Szybcy łucznicy.",
-                "sprite_path": "assets/sprites/cossack_cavalry.png",
-            },
-            "Piechota Kozacka": {
-                "hp": 115,
-                "morale": 110,
-                "discipline": 80,
-                "melee_damage": 35,
-                "ranged_damage": 35,
-                "range": 5,
-                "ammo": 25,
-                "defense": 3,
-                "speed": 4,
-                "rate_of_fire": 1.4,
-                "description": "Znakomici strzelcy.",
-                "sprite_path": "assets/sprites/cossack_infantry.png",
-            },
-            "Czern": {
-                "hp": 70,
-                "morale": 60,
-                "discipline": 40,
-                "melee_damage": 20,
-                "ranged_damage": 0,
-                "range": 1,
-                "ammo": 0,
-                "defense": 0,
-                "speed": 5,
-                "rate_of_fire": 1.0,
-                "description": "Liczni, słabo uzbrojeni.",
-                "sprite_path": "assets/sprites/cossack_infantry.png",
-            },
-            "Jazda Kozacka": {
-                "hp": 100,
-                "morale": 90,
-                "discipline": 75,
-                "melee_damage": 50,
-                "ranged_damage": 0,
-                "range": 2,
-                "ammo": 0,
-                "defense": 3,
-                "speed": 7,
-                "rate_of_fire": 1.0,
-                "description": "Jazda średnia.",
-                "sprite_path": "assets/sprites/cossack_cavalry.png",
-            },
-            "Artyleria Kozacka": {
-                "hp": 40,
-                "morale": 80,
-                "discipline": 80,
-                "melee_damage": 5,
-                "ranged_damage": 130,
-                "range": 14,
-                "ammo": 25,
-                "defense": 0,
-                "speed": 1,
-                "rate_of_fire": 0.25,
-                "description": "Ostrzał obozu.",
-                "sprite_path": "assets/sprites/cossack_infantry.png",
-            },
-        }
-
-        self.apply_weather_to_units()
+        self.unit_overrides = unit_overrides
+        self.unit_params = unit_types(self.weather, unit_overrides)
 
         self.setup_agents()
 
-    def find_healing_entrances(self):
-        self.healing_entrances = {}
-        found_entrances = []
-
-        try:
-            terrain_layer = self.map_data.get_layer_by_name("Teren")
-            if terrain_layer:
-                for x, y, gid in terrain_layer.iter_data():
-                    if gid != 0:
-                        props = self.map_data.get_tile_properties_by_gid(gid)
-                        if props and props.get("healing_zone_entry"):
-                            found_entrances.append((x, y))
-        except Exception as e:
-            print(f"Error finding healing entrances: {e}")
-
-        for center in self.healing_centers:
-            if found_entrances:
-                closest = min(found_entrances, key=lambda e: max(abs(e[0]-center[0]), abs(e[1]-center[1])))
-                if max(abs(closest[0]-center[0]), abs(closest[1]-center[1])) <= 2:
-                    self.healing_entrances[center] = closest
-                else:
-                    self.healing_entrances[center] = (center[0], center[1] + 1)
-            else:
-                self.healing_entrances[center] = (center[0], center[1] + 1)
+    def healing_center_at(self, pos):
+        center_id = self.healing_center_id[pos[1], pos[0]]
+        if center_id < 0:
+            return None
+        return self.healing_centers[center_id]
 
     def get_healing_entrance(self, center):
         return self.healing_entrances.get(center)
 
-    def load_terrain_data(self):
-        costs = np.ones((self.height, self.width), dtype=np.float32)
-        try:
-            terrain_layer = self.map_data.get_layer_by_name("Teren")
-            if terrain_layer:
-                for x, y, gid in terrain_layer.iter_data():
-                    if gid != 0:
-                        props = self.map_data.get_tile_properties_by_gid(gid)
-                        if props and "movement_cost" in props:
-                            costs[y][x] = props["movement_cost"]
-        except Exception as e:
-            print(f"Błąd ładowania terenu: {e}. Używam domyślnych kosztów.")
-        return costs
-
     def apply_weather_effects(self):
-        if self.weather == "rain":
-            print("🌧️ POGODA: Deszcz - teren zmienia się w błoto.")
-            self.terrain_costs = np.where(
-                self.terrain_costs == 1.5, self.terrain_costs * 2.5, self.terrain_costs
-            )
-        elif self.weather == "fog":
-            print("🌫️ POGODA: Mgła - ograniczona widoczność.")
-
-    def apply_weather_to_units(self):
-        if self.weather == "rain":
-            for name, params in self.unit_params.items():
-                if params["ranged_damage"] > 0:
-                    params["ranged_damage"] = int(params["ranged_damage"] * 0.3)
-                    params["description"] += " (Mokry proch/cięciwy!)"
-
-                if any(x in name for x in ["Jazda", "Husaria", "Pancerni", "Rajtaria"]):
-                    params["speed"] = max(2, params["speed"] - 3)
-                if "Artyleria" in name:
-                    params["speed"] = 1
+        if not self.quiet:
+            if self.weather == "rain":
+                print("🌧️ POGODA: Deszcz - teren zmienia się w błoto.")
+            elif self.weather == "fog":
+                print("🌫️ POGODA: Mgła - ograniczona widoczność.")
+
+        assets = load_map_assets(self.map_path, self.weather)
+        self.map_assets = assets
+        for name in (
+            "map_bundle",
+            "map_data",
+            "width",
+            "height",
+            "healing_centers",
+            "healing_center_id",
+            "healing_mask",
+            "healing_center_index",
+            "healing_tiles",
+            "healing_entrances",
+            "base_terrain_costs",
+            "terrain_costs",
+            "cover_mask",
+            "impassable_mask",
+            "spawn_valid",
+            "edge_field",
+            "healing_fields",
+        ):
+            setattr(self, name, getattr(assets, name))
+
+    def set_weather(self, weather):
+        self.weather = weather
+        self.apply_weather_effects()
+        self.path_engine.update_costs(self.terrain_costs)
+        self.flow_fields = FlowFieldCache(self.terrain_costs)
+        self.path_cache.clear()
+        self.hpa.update_costs(self.terrain_costs)
 
-                if params.get("rate_of_fire"):
-                    params["rate_of_fire"] = max(0.1, params["rate_of_fire"] * 0.8)
+        self.unit_params = unit_types(weather, self.unit_overrides)
+        for agent in self.schedule.agents:
+            agent.speed = agent.unit.speed
 
     def find_valid_spawn_position(self, y_min, y_max, max_attempts=75):
         x_left, x_right = 5, max(6, self.width - 5)
@@ -311,12 +126,8 @@ class BattleOfZborowModel(mesa.Model):
         for _ in range(max_attempts):
             x = self.random.randrange(x_left, x_right)
             y = self.random.randrange(y_low, y_high)
-            try:
-                if self.terrain_costs[y][x] >= 5:
-                    continue
-            except:
+            if not self.spawn_valid[y, x]:
                 continue
-
             if not self.grid.is_cell_empty((x, y)):
                 continue
             return (x, y)
@@ -338,16 +149,7 @@ class BattleOfZborowModel(mesa.Model):
             if unit_type not in self.unit_params:
                 continue
 
-            if unit_type in [
-                "Jazda Tatarska",
-                "Piechota Kozacka",
-                "Czern",
-                "Jazda Kozacka",
-                "Artyleria Kozacka",
-            ]:
-                faction = "Kozacy/Tatarzy"
-            else:
-                faction = "Armia Koronna"
+            faction = self.unit_params[unit_type].faction
 
             zone = deployment_zones.get(unit_type) if deployment_zones else None
 
@@ -375,96 +177,115 @@ class BattleOfZborowModel(mesa.Model):
         for _ in range(max_attempts):
             x = self.random.randint(x_min, x_max)
             y = self.random.randint(y_min, y_max)
-            if not self.grid.is_cell_empty((x, y)):
-                continue
-            if self.terrain_costs[y][x] >= 5:
+            if not self.spawn_valid[y, x] or not self.grid.is_cell_empty((x, y)):
                 continue
             return (x, y)
         return (x_min, y_min)
 
+    def find_path(self, start, goal):
+        occupancy = self.grid.occupancy
+        path = self.path_cache.get(start, goal, self.weather, occupancy)
+        if path is not None:
+            return path
+
+        path = self.path_engine.find_path(start, goal, occupancy)
+        if path and path[-1] == goal:
+            self.path_cache.put(start, goal, self.weather, path)
+        return path
+
+    def find_detour(self, start, path, radius=4, lookahead=6):
+        sx, sy = start
+        bounds = (sx - radius, sy - radius, sx + radius + 1, sy + radius + 1)
+        for k, pos in enumerate(path[:lookahead]):
+            if max(abs(pos[0] - sx), abs(pos[1] - sy)) > radius:
+                break
+            if not self.grid.is_cell_empty(pos):
+                continue
+            detour = self.path_engine.find_path(
+                start, pos, self.grid.occupancy, bounds=bounds
+            )
+            if detour and detour[-1] == pos:
+                return detour + path[k + 1 :]
+        return None
+
+    def plan_route(self, start, goal):
+        return self.hpa.plan(start, goal)
+
+    def get_target_field(self, target):
+        return self.flow_fields.get_field(
+            ("target", target.unique_id), lambda: [target.get_pos_tuple()]
+        )
+
     def step(self):
+        self.flow_fields.new_tick()
+        self.enemy_query.invalidate()
+        self.path_scheduler.begin_tick()
         self.schedule.step()
+        self.combat.resolve()
+        self.panic.propagate()
 
-        for agent in self.schedule.agents:
-            if isinstance(agent, MilitaryAgent) and agent.hp > 0 and agent.pos:
-                x, y = agent.pos
-                if 0 <= x < self.width and 0 <= y < self.height:
-                    if agent.faction == "Armia Koronna":
-                        self.heatmap_crown[y][x] += 1
-                    else:
-                        self.heatmap_cossack[y][x] += 1
+        self.accumulate_heatmaps()
 
         self.cleanup_dead_agents()
         self.apply_camp_healing()
 
+    def accumulate_heatmaps(self):
+        store = self.agent_store
+        for faction, heatmap in (
+            ("Armia Koronna", self.heatmap_crown),
+            ("Kozacy/Tatarzy", self.heatmap_cossack),
+        ):
+            slots = store.placed_slots(faction)
+            np.add.at(heatmap, (store.y[slots], store.x[slots]), 1)
+
     def is_zone_full(self, center):
-        cx, cy = center
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                x, y = cx + dx, cy + dy
-                if 0 <= x < self.width and 0 <= y < self.height:
-                    cell_contents = self.grid.get_cell_list_contents([(x, y)])
-                    if not any(isinstance(a, MilitaryAgent) for a in cell_contents):
-                        return False
-        return True
+        return self.grid.is_zone_full(self.healing_center_index[center])
 
     def apply_camp_healing(self):
-        for tile in self.healing_tiles:
-            cell_contents = self.grid.get_cell_list_contents([tile])
-
-            for agent in cell_contents:
-                    if (
-                        isinstance(agent, MilitaryAgent)
-                        and agent.faction == "Armia Koronna"
-                        and agent.hp > 0
-                    ):
-
-                        if agent.hp < agent.max_hp:
-                            heal_amount = 5
-                            agent.hp = min(agent.max_hp, agent.hp + heal_amount)
-
-                        if agent.morale < agent.max_morale:
-                            morale_boost = 3
-                            agent.morale = min(
-                                agent.max_morale, agent.morale + morale_boost
-                            )
-
-                        if (
-                            agent.state == "FLEEING"
-                            and agent.hp > agent.max_hp * 0.6
-                            and agent.morale > agent.max_morale * 0.6
-                        ):
-                            agent.state = "IDLE"
-                            agent.path = []
+        store = self.agent_store
+        slots = self.grid.zone_occupant_slots()
+        crown = store.factions.get("Armia Koronna")
+        slots = slots[(store.faction[slots] == crown) & (store.hp[slots] > 0)]
+        if slots.size == 0:
+            return
 
-    def cleanup_dead_agents(self):
-        dead_agents = [
-            agent
-            for agent in self.schedule.agents
-            if isinstance(agent, MilitaryAgent) and agent.hp <= 0
+        hp, max_hp = store.hp[slots], store.max_hp[slots]
+        store.hp[slots] = np.where(hp < max_hp, np.minimum(max_hp, hp + 5), hp)
+        morale, max_morale = store.morale[slots], store.max_morale[slots]
+        store.morale[slots] = np.where(
+            morale < max_morale, np.minimum(max_morale, morale + 3), morale
+        )
+
+        recovered = slots[
+            (store.state[slots] == STATE_CODES["FLEEING"])
+            & (store.hp[slots] > max_hp * 0.6)
+            & (store.morale[slots] > max_morale * 0.6)
         ]
-        for agent in dead_agents:
+        for slot in recovered:
+            agent = store.agents[slot]
+            agent.state = "IDLE"
+            agent.reset_path()
+
+    def cleanup_dead_agents(self):
+        store = self.agent_store
+        for slot in store.take_pending_deaths():
+            agent = store.agents[slot]
             if agent.pos:
                 self.grid.remove_agent(agent)
-            if agent in self.schedule.agents:
-                self.schedule.remove(agent)
+            self.schedule.remove(agent)
+            agent.release_slot()
+
+    def get_faction_counts(self):
+        return {
+            "crown_count": self.agent_store.count("Armia Koronna"),
+            "cossack_count": self.agent_store.count("Kozacy/Tatarzy"),
+        }
 
     def get_battle_status(self):
         self.cleanup_dead_agents()
-        crown_count = sum(
-            1
-            for a in self.schedule.agents
-            if isinstance(a, MilitaryAgent)
-            and a.faction == "Armia Koronna"
-            and a.hp > 0
-        )
-        cossack_count = sum(
-            1
-            for a in self.schedule.agents
-            if isinstance(a, MilitaryAgent)
-            and a.faction == "Kozacy/Tatarzy"
-            and a.hp > 0
-        )
+        counts = self.get_faction_counts()
+        crown_count = counts["crown_count"]
+        cossack_count = counts["cossack_count"]
 
         if crown_count == 0 and cossack_count > 0:
             return {
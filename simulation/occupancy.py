@@ -0,0 +1,62 @@
+import mesa
+import numpy as np
+from .spatial_index import FactionSpatialIndex
+
+
+class OccupancyGrid(mesa.space.MultiGrid):
+    def __init__(self, width, height, torus=False):
+        super().__init__(width, height, torus)
+        self.occupancy = np.zeros((height, width), dtype=np.uint16)
+        self.version = 0
+        self.index = FactionSpatialIndex(width, height)
+        self.zone_ids = None
+
+    def set_zones(self, zone_ids):
+        self.zone_ids = zone_ids
+        zones = int(zone_ids.max()) + 1 if zone_ids.size else 0
+        self.zone_size = np.bincount(zone_ids[zone_ids >= 0], minlength=zones)
+        self.zone_filled = np.bincount(
+            zone_ids[(zone_ids >= 0) & (self.occupancy > 0)], minlength=zones
+        )
+        self.zone_slots = [set() for _ in range(zones)]
+
+    def is_zone_full(self, zone):
+        return bool(self.zone_filled[zone] == self.zone_size[zone])
+
+    def zone_occupant_slots(self):
+        if self.zone_ids is None:
+            return np.empty(0, dtype=np.intp)
+        return np.fromiter(
+            (slot for slots in self.zone_slots for slot in slots), dtype=np.intp
+        )
+
+    def place_agent(self, agent, pos):
+        x, y = pos
+        if agent.pos is None or agent not in self._grid[x][y]:
+            super().place_agent(agent, pos)
+            self.occupancy[y, x] += 1
+            self.version += 1
+            self.index.add(agent, pos)
+            if self.zone_ids is not None:
+                zone = self.zone_ids[y, x]
+                if zone >= 0:
+                    if self.occupancy[y, x] == 1:
+                        self.zone_filled[zone] += 1
+                    self.zone_slots[zone].add(agent.slot)
+
+    def remove_agent(self, agent):
+        x, y = agent.pos
+        super().remove_agent(agent)
+        self.occupancy[y, x] -= 1
+        self.version += 1
+        self.index.remove(agent, (x, y))
+        if self.zone_ids is not None:
+            zone = self.zone_ids[y, x]
+            if zone >= 0:
+                if self.occupancy[y, x] == 0:
+                    self.zone_filled[zone] -= 1
+                self.zone_slots[zone].discard(agent.slot)
+
+    def is_cell_empty(self, pos):
+        x, y = pos
+        return self.occupancy[y, x] == 0
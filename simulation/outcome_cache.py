@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from .map_bundle import map_sources
+from .units import unit_types
+
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_PATH = "outcome_cache.sqlite"
+
+_file_digests = {}
+_map_sources = {}
+_code_digest = None
+
+
+def _file_digest(path):
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _file_digests[key] = digest
+    return digest
+
+
+def map_fingerprint(map_path):
+    stat = os.stat(map_path)
+    key = (os.path.abspath(map_path), stat.st_mtime_ns, stat.st_size)
+    sources = _map_sources.get(key)
+    if sources is None:
+        sources = _map_sources[key] = map_sources(map_path)
+    return {name: _file_digest(path) for name, path in sorted(sources.items())}
+
+
+def code_fingerprint():
+    global _code_digest
+    if _code_digest is None:
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                digest.update(name.encode("utf-8"))
+                digest.update(_file_digest(os.path.join(package_dir, name)).encode())
+        _code_digest = digest.hexdigest()
+    return _code_digest
+
+
+def params_hash(units_config, unit_overrides=None, max_steps=None, map_path=None):
+    units = unit_types("clear", unit_overrides)
+    payload = {
+        "version": CACHE_VERSION,
+        "code": code_fingerprint(),
+        "units_config": units_config,
+        "units": {
+            name: list(units[name])
+            for name in sorted(units_config)
+            if name in units
+        },
+        "max_steps": max_steps,
+        "map": os.path.basename(map_path) if map_path else None,
+        "map_digest": map_fingerprint(map_path) if map_path else None,
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class OutcomeCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            " scenario_id TEXT, weather TEXT, seed INTEGER, params_hash TEXT,"
+            " result TEXT, PRIMARY KEY (scenario_id, weather, seed, params_hash))"
+        )
+        self.conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scenario_id, weather, seed, params):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT result FROM outcomes WHERE scenario_id = ? AND weather = ?"
+                " AND seed = ? AND params_hash = ?",
+                (scenario_id, weather, seed, params),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        result = json.loads(row[0])
+        result["cached"] = True
+        return result
+
+    def put(self, scenario_id, weather, seed, params, result):
+        stored = {k: v for k, v in result.items() if k != "cached"}
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?)",
+                (scenario_id, weather, seed, params, json.dumps(stored)),
+            )
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM outcomes")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def stats(self):
+        with self.lock:
+            (entries,) = self.conn.execute("SELECT COUNT(*) FROM outcomes").fetchone()
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,81 @@
+import numpy as np
+from .agent_store import STATE_CODES
+
+
+PANIC_STRENGTHS = {"death": 20, "chain": 10}
+
+
+def box_sum(grids, radius):
+    k = 2 * radius + 1
+    padded = np.pad(grids, ((0, 0), (radius + 1, radius), (radius + 1, radius)))
+    c = padded.cumsum(axis=1).cumsum(axis=2)
+    return c[:, k:, k:] - c[:, :-k, k:] - c[:, k:, :-k] + c[:, :-k, :-k]
+
+
+class PanicPropagator:
+    def __init__(self, model, radius=3):
+        self.model = model
+        self.radius = radius
+        self.kinds = list(PANIC_STRENGTHS)
+        self.events = {kind: [] for kind in self.kinds}
+
+        self.recorded = {kind: 0 for kind in self.kinds}
+        self.propagations = 0
+        self.agents_affected = 0
+
+    def record(self, agent, kind):
+        self.events[kind].append(agent.slot)
+
+    def record_slots(self, slots, kind):
+        self.events[kind].extend(int(slot) for slot in slots)
+
+    def propagate(self):
+        if not any(self.events.values()):
+            return
+
+        store = self.model.agent_store
+        height, width = self.model.height, self.model.width
+        factions = max(1, len(store.factions))
+        size = store.size
+
+        candidates = np.flatnonzero(
+            store.living()
+            & (store.x[:size] >= 0)
+            & (store.state[:size] != STATE_CODES["FLEEING"])
+        )
+        cf = store.faction[candidates]
+        cx = store.x[candidates]
+        cy = store.y[candidates]
+        resistance = store.discipline[candidates] / 5
+        reduction = np.zeros(candidates.size)
+
+        for kind in self.kinds:
+            slots = np.array(self.events[kind], dtype=np.intp)
+            self.events[kind] = []
+            if slots.size == 0:
+                continue
+            self.recorded[kind] += int(slots.size)
+
+            slots = slots[store.x[slots] >= 0]
+            grids = np.zeros((factions, height, width), dtype=np.int32)
+            np.add.at(grids, (store.faction[slots], store.y[slots], store.x[slots]), 1)
+            window = box_sum(grids, self.radius) - grids
+
+            hits = window[cf, cy, cx]
+            strength = PANIC_STRENGTHS[kind]
+            reduction += hits * np.maximum(0, strength - resistance)
+
+        affected = candidates[reduction > 0]
+        store.morale[affected] = np.maximum(
+            0, store.morale[affected] - reduction[reduction > 0]
+        )
+        self.propagations += 1
+        self.agents_affected += int(affected.size)
+
+    def stats(self):
+        return {
+            "death_events": self.recorded["death"],
+            "chain_events": self.recorded["chain"],
+            "propagations": self.propagations,
+            "agents_affected": self.agents_affected,
+        }
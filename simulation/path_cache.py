@@ -0,0 +1,112 @@
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _path_nbytes(path, index, cells):
+    tuple_size = sys.getsizeof((0, 0))
+    return (
+        sys.getsizeof(path)
+        + len(path) * tuple_size
+        + sys.getsizeof(index)
+        + cells.nbytes
+    )
+
+
+class PathCache:
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.by_goal = {}
+
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
+        self.invalidated = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.current_bytes = 0
+
+    def _is_clear(self, cells, position, occupancy):
+        if occupancy is None:
+            return True
+        xs, ys = cells[0, position:-1], cells[1, position:-1]
+        return not occupancy[ys, xs].any()
+
+    def get(self, start, goal, weather, occupancy=None):
+        goal_key = (goal, weather)
+        key = (start,) + goal_key
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            if self._is_clear(entry[2], 0, occupancy):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return list(entry[0])
+            self.invalidated += 1
+            self._remove(key)
+
+        for cached_key in self.by_goal.get(goal_key, ()):
+            path, index, cells, _ = self.entries[cached_key]
+            position = index.get(start)
+            if position is None:
+                continue
+            if not self._is_clear(cells, position + 1, occupancy):
+                continue
+            self.entries.move_to_end(cached_key)
+            self.suffix_hits += 1
+            return path[position + 1 :]
+
+        self.misses += 1
+        return None
+
+    def put(self, start, goal, weather, path):
+        if not path:
+            return
+        goal_key = (goal, weather)
+        key = (start,) + goal_key
+        if key in self.entries:
+            self._remove(key)
+
+        stored = list(path)
+        index = {pos: i for i, pos in enumerate(stored)}
+        cells = np.array(stored, dtype=np.intp).T
+        nbytes = _path_nbytes(stored, index, cells)
+        self.entries[key] = (stored, index, cells, nbytes)
+        self.by_goal.setdefault(goal_key, []).append(key)
+        self.current_bytes += nbytes
+
+        while len(self.entries) > self.max_entries:
+            self.evictions += 1
+            self.evicted_bytes += self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        _, _, _, nbytes = self.entries.pop(key)
+        goal_key = key[1:]
+        keys = self.by_goal.get(goal_key)
+        if keys is not None:
+            keys.remove(key)
+            if not keys:
+                del self.by_goal[goal_key]
+        self.current_bytes -= nbytes
+        return nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.by_goal.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.suffix_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "suffix_hits": self.suffix_hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+            "hit_rate": (self.hits + self.suffix_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "current_bytes": self.current_bytes,
+        }
@@ -0,0 +1,109 @@
+import heapq
+import itertools
+import time
+
+
+PRIORITY_FLEEING = 0
+PRIORITY_COMBAT = 1
+PRIORITY_STRATEGIC = 2
+
+
+class PathScheduler:
+    def __init__(self, max_searches=48, max_ms=None, search_counter=None):
+        self.max_searches = max_searches
+        self.max_ms = max_ms
+        self.search_counter = search_counter
+
+        self.queue = []
+        self.pending = {}
+        self.counter = itertools.count()
+
+        self.searches_this_tick = 0
+        self.ms_this_tick = 0.0
+
+        self.immediate = 0
+        self.deferred = 0
+        self.served_from_queue = 0
+        self.dropped = 0
+        self.refined = 0
+        self.refines_deferred = 0
+        self.max_queue = 0
+
+    def has_budget(self):
+        if self.max_searches is not None and self.searches_this_tick >= self.max_searches:
+            return False
+        if self.max_ms is not None and self.ms_this_tick >= self.max_ms:
+            return False
+        return True
+
+    def _run(self, agent, target):
+        self._measure(agent.calculate_path, target)
+
+    def _measure(self, fn, *args):
+        before = self.search_counter() if self.search_counter else 0
+        t0 = time.perf_counter()
+        fn(*args)
+        self.ms_this_tick += (time.perf_counter() - t0) * 1000
+        if self.search_counter:
+            self.searches_this_tick += self.search_counter() - before
+        else:
+            self.searches_this_tick += 1
+
+    def refine(self, agent):
+        if not self.has_budget():
+            self.refines_deferred += 1
+            return False
+        self._measure(agent.refine_segment)
+        self.refined += 1
+        return True
+
+    def request(self, agent, target, priority=PRIORITY_STRATEGIC):
+        entry = self.pending.get(agent.unique_id)
+        if entry is None and self.has_budget():
+            self._run(agent, target)
+            self.immediate += 1
+            return True
+
+        if entry is not None:
+            if priority >= entry[0]:
+                entry[3] = target
+                return False
+            entry[4] = False
+
+        entry = [priority, next(self.counter), agent, target, True]
+        self.pending[agent.unique_id] = entry
+        heapq.heappush(self.queue, entry)
+        self.deferred += 1
+        self.max_queue = max(self.max_queue, len(self.pending))
+        return False
+
+    def begin_tick(self):
+        self.searches_this_tick = 0
+        self.ms_this_tick = 0.0
+
+        while self.queue and self.has_budget():
+            _, _, agent, target, valid = heapq.heappop(self.queue)
+            if not valid:
+                continue
+            del self.pending[agent.unique_id]
+            if agent.hp <= 0 or agent.pos is None:
+                self.dropped += 1
+                continue
+            self._run(agent, target)
+            self.served_from_queue += 1
+
+    def stats(self):
+        return {
+            "max_searches": self.max_searches,
+            "max_ms": self.max_ms,
+            "searches_this_tick": self.searches_this_tick,
+            "ms_this_tick": self.ms_this_tick,
+            "immediate": self.immediate,
+            "deferred": self.deferred,
+            "served_from_queue": self.served_from_queue,
+            "dropped": self.dropped,
+            "refined": self.refined,
+            "refines_deferred": self.refines_deferred,
+            "queued": len(self.pending),
+            "max_queue": self.max_queue,
+        }
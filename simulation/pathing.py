@@ -0,0 +1,164 @@
+import heapq
+import math
+
+import numpy as np
+
+
+COST_SCALE = 256
+
+ORTHOGONAL_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+DIAGONAL_STEPS = ((1, -1), (1, 1), (-1, 1), (-1, -1))
+
+
+class PathEngine:
+    def __init__(self, terrain_costs, diagonal=False, max_expanded=None):
+        self.height, self.width = terrain_costs.shape
+        self.diagonal = diagonal
+        self.max_expanded = max_expanded
+        size = self.width * self.height
+
+        self.g_score = [0] * size
+        self.parent = [-1] * size
+        self.seen = [0] * size
+        self.closed = [0] * size
+        self.search_id = 0
+        self.index_bits = size.bit_length()
+        self.index_mask = (1 << self.index_bits) - 1
+
+        self.searches = 0
+        self.expanded = 0
+        self.truncated = 0
+
+        self.update_costs(terrain_costs)
+
+    def update_costs(self, terrain_costs):
+        scaled = np.round(terrain_costs.astype(np.float64).ravel() * COST_SCALE)
+        costs = np.maximum(0, scaled).astype(np.int64)
+        self.costs = costs.tolist()
+        self.diagonal_costs = np.round(costs * math.sqrt(2)).astype(np.int64).tolist()
+        walkable = costs[costs > 0]
+        self.min_cost = int(walkable.min()) if walkable.size else 0
+
+    def find_path(self, start, goal, occupancy=None, bounds=None):
+        width, height = self.width, self.height
+        sx, sy = start
+        gx, gy = goal
+        if bounds is None:
+            x0, y0, x1, y1 = 0, 0, width, height
+        else:
+            x0, y0 = max(0, bounds[0]), max(0, bounds[1])
+            x1, y1 = min(width, bounds[2]), min(height, bounds[3])
+        if not (x0 <= gx < x1 and y0 <= gy < y1):
+            return []
+        if start == goal:
+            return []
+
+        start_idx = sy * width + sx
+        goal_idx = gy * width + gx
+        if self.costs[goal_idx] <= 0:
+            return []
+
+        self.search_id += 1
+        self.searches += 1
+        sid = self.search_id
+        g_score = self.g_score
+        parent = self.parent
+        seen = self.seen
+        closed = self.closed
+        costs = self.costs
+        diagonal_costs = self.diagonal_costs
+        min_cost = self.min_cost
+        bits = self.index_bits
+        mask = self.index_mask
+        occ = occupancy.ravel() if occupancy is not None else None
+        diagonal = self.diagonal
+        steps = ORTHOGONAL_STEPS + DIAGONAL_STEPS if diagonal else ORTHOGONAL_STEPS
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        g_score[start_idx] = 0
+        parent[start_idx] = -1
+        seen[start_idx] = sid
+        heap = [start_idx]
+        expanded = 0
+        limit = self.max_expanded
+        best_idx = start_idx
+        if diagonal:
+            best_h = max(abs(sx - gx), abs(sy - gy))
+        else:
+            best_h = abs(sx - gx) + abs(sy - gy)
+        found = False
+
+        while heap:
+            idx = heappop(heap) & mask
+            if idx == goal_idx:
+                found = True
+                break
+            if closed[idx] == sid:
+                continue
+            closed[idx] = sid
+            expanded += 1
+            if limit is not None and expanded > limit:
+                self.truncated += 1
+                break
+
+            g = g_score[idx]
+            x, y = idx % width, idx // width
+            for dx, dy in steps:
+                nx, ny = x + dx, y + dy
+                if nx < x0 or ny < y0 or nx >= x1 or ny >= y1:
+                    continue
+                n_idx = ny * width + nx
+                if closed[n_idx] == sid:
+                    continue
+                step = diagonal_costs[n_idx] if dx and dy else costs[n_idx]
+                if step <= 0:
+                    continue
+                if occ is not None and n_idx != goal_idx and occ[n_idx]:
+                    continue
+                ng = g + step
+                if seen[n_idx] != sid or ng < g_score[n_idx]:
+                    seen[n_idx] = sid
+                    g_score[n_idx] = ng
+                    parent[n_idx] = idx
+                    hx, hy = abs(nx - gx), abs(ny - gy)
+                    if diagonal:
+                        h = max(hx, hy)
+                    else:
+                        h = hx + hy
+                    if h < best_h:
+                        best_h = h
+                        best_idx = n_idx
+                    heappush(heap, ((ng + h * min_cost) << bits) | n_idx)
+
+        self.expanded += expanded
+        if found:
+            idx = goal_idx
+        elif limit is not None and expanded > limit:
+            idx = best_idx
+        else:
+            return []
+
+        path = []
+        while idx != start_idx:
+            path.append((idx % width, idx // width))
+            idx = parent[idx]
+        path.reverse()
+        return path
+
+    def path_cost(self, start, path):
+        total = 0
+        px, py = start
+        for x, y in path:
+            idx = y * self.width + x
+            total += self.diagonal_costs[idx] if x != px and y != py else self.costs[idx]
+            px, py = x, y
+        return total / COST_SCALE
+
+    def stats(self):
+        return {
+            "searches": self.searches,
+            "truncated": self.truncated,
+            "expanded_nodes": self.expanded,
+            "avg_expanded": self.expanded / self.searches if self.searches else 0.0,
+        }
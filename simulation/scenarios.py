@@ -0,0 +1,223 @@
+import copy
+
+from .units import UNIT_TYPES
+
+
+SCENARIOS = {
+    "scenario_1": {
+        "id": "scenario_1",
+        "name": "Dzień 1: Chaos na Przeprawie (15 VIII)",
+        "description": "Atak na przeprawę. Wojska koronne (niebieskie) utknęły na mostach i lewym brzegu. Tatarzy atakują z lasów po lewej.",
+        "units": {
+            "Pospolite Ruszenie": 10,
+            "Czeladz Obozowa": 6,
+            "Pancerni": 4,
+            "Husaria": 2,
+            "Jazda Tatarska": 16,
+            "Jazda Kozacka": 4,
+            "_deployment": {
+                "Czeladz Obozowa": {"x": [35, 55], "y": [30, 70]},
+                "Pospolite Ruszenie": {
+                    "x": [25, 45],
+                    "y": [20, 80],
+                },
+                "Pancerni": {
+                    "x": [45, 60],
+                    "y": [10, 90],
+                },
+                "Husaria": {"x": [50, 65], "y": [40, 60]},
+                "Jazda Tatarska": {"x": [2, 20], "y": [10, 90]},
+                "Jazda Kozacka": {"x": [2, 15], "y": [40, 60]},
+            },
+        },
+    },
+    "scenario_2": {
+        "id": "scenario_2",
+        "name": "Dzień 2: Obrona Wałów (16 VIII)",
+        "description": "Główna faza bitwy. Polacy obsadzają fortyfikacje po prawej stronie mapy. Kozacy szturmują przez przedpole.",
+        "units": {
+            "Piechota Niemiecka": 10,
+            "Dragonia": 6,
+            "Artyleria Koronna": 3,
+            "Husaria": 3,
+            "Piechota Kozacka": 18,
+            "Czern": 12,
+            "Artyleria Kozacka": 3,
+            "Jazda Tatarska": 5,
+            "_deployment": {
+                "Piechota Niemiecka": {
+                    "x": [110, 125],
+                    "y": [15, 85],
+                },
+                "Artyleria Koronna": {"x": [115, 130], "y": [20, 80]},
+                "Dragonia": {"x": [120, 140], "y": [10, 90]},
+                "Husaria": {"x": [130, 150], "y": [40, 60]},
+                "Piechota Kozacka": {"x": [60, 95], "y": [10, 90]},
+                "Czern": {"x": [50, 80], "y": [20, 80]},
+                "Artyleria Kozacka": {"x": [40, 60], "y": [30, 70]},
+                "Jazda Tatarska": {
+                    "x": [30, 50],
+                    "y": [10, 90],
+                },
+            },
+        },
+    },
+    "scenario_3": {
+        "id": "scenario_3",
+        "name": "Kryzys: Kontratak Czeladzi",
+        "description": "Krytyczny moment. Wróg wdarł się do miasta (prawa strona). Czeladź broni centrum obozu.",
+        "units": {
+            "Czeladz Obozowa": 20,
+            "Dragonia": 4,
+            "Pospolite Ruszenie": 2,
+            "Piechota Kozacka": 12,
+            "Jazda Kozacka": 4,
+            "_deployment": {
+                "Czeladz Obozowa": {"x": [135, 155], "y": [30, 70]},
+                "Dragonia": {"x": [130, 145], "y": [20, 80]},
+                "Piechota Kozacka": {"x": [110, 130], "y": [15, 85]},
+                "Jazda Kozacka": {"x": [100, 120], "y": [40, 60]},
+            },
+        },
+    },
+    "scenario_4": {
+        "id": "scenario_4",
+        "name": "Hipotetyczne: Bitwa na Przedpolu",
+        "description": "Jan Kazimierz wyprowadza wojska przed wały (na środek mapy), by wydać bitwę w polu.",
+        "units": {
+            "Piechota Niemiecka": 8,
+            "Husaria": 6,
+            "Pancerni": 8,
+            "Dragonia": 4,
+            "Piechota Kozacka": 12,
+            "Jazda Tatarska": 12,
+            "Jazda Kozacka": 8,
+            "_deployment": {
+                "Piechota Niemiecka": {"x": [90, 105], "y": [20, 80]},
+                "Husaria": {"x": [100, 110], "y": [30, 70]},
+                "Pancerni": {"x": [90, 105], "y": [10, 90]},
+                "Piechota Kozacka": {"x": [50, 70], "y": [20, 80]},
+                "Jazda Kozacka": {"x": [40, 60], "y": [10, 90]},
+                "Jazda Tatarska": {"x": [30, 50], "y": [5, 95]},
+            },
+        },
+    },
+    "scenario_5": {
+        "id": "scenario_5",
+        "name": "Potyczka nad Rzeką (Zwiad)",
+        "description": "Walka podjazdowa o kontrolę nad mostami na rzece Strypie.",
+        "units": {
+            "Pancerni": 5,
+            "Dragonia": 2,
+            "Jazda Tatarska": 5,
+            "Jazda Kozacka": 3,
+            "_deployment": {
+                "Pancerni": {"x": [50, 60], "y": [30, 70]},
+                "Dragonia": {"x": [55, 65], "y": [40, 60]},
+                "Jazda Tatarska": {"x": [20, 35], "y": [20, 80]},
+                "Jazda Kozacka": {"x": [25, 40], "y": [40, 60]},
+            },
+        },
+    },
+    "scenario_6": {
+        "id": "scenario_6",
+        "name": "Szarża Husarii z Obozu",
+        "description": "Wycieczka Husarii zza wałów przeciwko oblegającym wojskom.",
+        "units": {
+            "Husaria": 10,
+            "Pancerni": 4,
+            "Piechota Kozacka": 10,
+            "Czern": 15,
+            "Jazda Tatarska": 5,
+            "_deployment": {
+                "Husaria": {"x": [110, 125], "y": [10, 90]},
+                "Pancerni": {"x": [120, 130], "y": [20, 80]},
+                "Czern": {"x": [70, 90], "y": [10, 90]},
+                "Piechota Kozacka": {"x": [60, 80], "y": [20, 80]},
+                "Jazda Tatarska": {"x": [40, 60], "y": [5, 95]},
+            },
+        },
+    },
+    "scenario_7": {
+        "id": "scenario_7",
+        "name": "Rzeczywisty: Pełne Oblężenie",
+        "description": "Historyczna dysproporcja sił (1:4). Polacy zamknięci w fortyfikacjach (prawo), wróg zalewa całą mapę.",
+        "units": {
+            "Piechota Niemiecka": 6,
+            "Dragonia": 4,
+            "Husaria": 2,
+            "Pospolite Ruszenie": 6,
+            "Artyleria Koronna": 2,
+            "Piechota Kozacka": 25,
+            "Czern": 20,
+            "Jazda Tatarska": 15,
+            "Artyleria Kozacka": 4,
+            "_deployment": {
+                "Piechota Niemiecka": {"x": [115, 130], "y": [15, 85]},
+                "Artyleria Koronna": {"x": [120, 135], "y": [25, 75]},
+                "Dragonia": {"x": [125, 145], "y": [10, 90]},
+                "Husaria": {"x": [140, 155], "y": [40, 60]},
+                "Pospolite Ruszenie": {"x": [135, 155], "y": [10, 90]},
+                "Piechota Kozacka": {
+                    "x": [50, 100],
+                    "y": [5, 95],
+                },
+                "Czern": {"x": [40, 80], "y": [10, 90]},
+                "Jazda Tatarska": {"x": [5, 60], "y": [0, 100]},
+                "Artyleria Kozacka": {"x": [30, 50], "y": [20, 80]},
+            },
+        },
+    },
+    "experiment_quality_vs_quantity": {
+        "id": "experiment_quality_vs_quantity",
+        "name": "Eksperyment: Husaria vs Czerń",
+        "description": "Test progu wytrzymałości elitarnej jazdy. 5 chorągwi Husarii przeciwko rosnącej fali Czerni (40 jednostek).",
+        "units": {
+            "Husaria": 5,
+            "Czern": 40,
+            "_deployment": {
+                "Husaria": {"x": [100, 120], "y": [40, 60]},
+                "Czern": {"x": [20, 60], "y": [10, 90]},
+            },
+        },
+    },
+    "experiment_firepower": {
+        "id": "experiment_firepower",
+        "name": "Eksperyment: Pojedynek Ogniowy",
+        "description": "Symetryczne starcie strzeleckie. 10 oddziałów Piechoty Niemieckiej vs 15 oddziałów Piechoty Kozackiej w otwartym polu.",
+        "units": {
+            "Piechota Niemiecka": 10,
+            "Piechota Kozacka": 15,
+            "_deployment": {
+                "Piechota Niemiecka": {"x": [120, 130], "y": [10, 90]},
+                "Piechota Kozacka": {"x": [30, 40], "y": [10, 90]},
+            },
+        },
+    },
+    "experiment_mobility": {
+        "id": "experiment_mobility",
+        "name": "Eksperyment: Szarża na Dragonów",
+        "description": "Czy szybka jazda tatarska (20 jednostek) zdoła dopaść i rozbić spieszoną Dragonię (10 jednostek) zanim zostanie wystrzelana?",
+        "units": {
+            "Dragonia": 10,
+            "Jazda Tatarska": 20,
+            "_deployment": {
+                "Dragonia": {"x": [130, 140], "y": [30, 70]},
+                "Jazda Tatarska": {"x": [20, 50], "y": [10, 90]},
+            },
+        },
+    },
+}
+
+
+def get_scenarios():
+    scenarios = copy.deepcopy(SCENARIOS)
+    for scenario in scenarios.values():
+        for unit in UNIT_TYPES["clear"]:
+            if unit not in scenario["units"]:
+                scenario["units"][unit] = 0
+    return scenarios
+
+
+def get_scenario(scenario_id):
+    return get_scenarios()[scenario_id]
@@ -0,0 +1,234 @@
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from .ticker import TickLoop, build_snapshot
+
+
+class SessionLimitError(RuntimeError):
+    pass
+
+
+def _owned_array_bytes(obj, seen):
+    total = 0
+    for value in vars(obj).values():
+        if isinstance(value, np.ndarray) and value.flags.writeable:
+            if id(value) not in seen:
+                seen.add(id(value))
+                total += value.nbytes
+    return total
+
+
+def estimate_model_memory(model):
+    seen = set()
+    total = _owned_array_bytes(model, seen)
+    for value in vars(model).values():
+        if hasattr(value, "__dict__") and not isinstance(value, type):
+            total += _owned_array_bytes(value, seen)
+
+    store = model.agent_store
+    for agent in store.agents:
+        if agent is not None:
+            total += sys.getsizeof(agent)
+    for table in (store.paths, store.waypoints):
+        total += sys.getsizeof(table)
+        total += sum(sys.getsizeof(entry) for entry in table if entry is not None)
+
+    total += model.flow_fields.nbytes()
+    total += model.path_cache.current_bytes
+    return total
+
+
+class SimulationSession:
+    def __init__(self, session_id, model, scenario_id=None):
+        self.session_id = session_id
+        self.model = model
+        self.scenario_id = scenario_id
+        self.running = True
+        self.lock = threading.Lock()
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.memory_bytes = estimate_model_memory(model)
+        self.snapshot = None
+        self.ticker = None
+
+    def publish(self, snapshot):
+        self.snapshot = snapshot
+
+    def close(self):
+        self.running = False
+        if self.ticker is not None:
+            self.ticker.stop()
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+    def idle_seconds(self, now=None):
+        return (now or time.monotonic()) - self.last_access
+
+    def update_memory(self):
+        self.memory_bytes = estimate_model_memory(self.model)
+        return self.memory_bytes
+
+
+class SessionRegistry:
+    def __init__(
+        self,
+        max_sessions=16,
+        idle_timeout=900,
+        max_memory_bytes=None,
+        reap_interval=None,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_memory_bytes = max_memory_bytes
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.reserved = set()
+
+        self.created = 0
+        self.evicted = 0
+        self.rejected = 0
+
+        # Abandoned sessions must not keep their tick threads running until
+        # the next request happens to reach the registry.
+        if reap_interval is None:
+            reap_interval = max(1.0, min(60.0, idle_timeout / 10))
+        self.reap_interval = reap_interval
+        self.reaper_stop = threading.Event()
+        self.reaper = threading.Thread(
+            target=self._reap, name="session-reaper", daemon=True
+        )
+        self.reaper.start()
+
+    def _reap(self):
+        while not self.reaper_stop.wait(self.reap_interval):
+            self.evict_idle()
+
+    def shutdown(self):
+        self.reaper_stop.set()
+        self.reaper.join()
+        with self.lock:
+            sessions = list(self.sessions.values())
+            self.sessions = {}
+        for session in sessions:
+            session.close()
+
+    def _evict_idle(self, now):
+        expired = [
+            sid
+            for sid, session in self.sessions.items()
+            if session.idle_seconds(now) > self.idle_timeout
+        ]
+        for sid in expired:
+            self.sessions.pop(sid).close()
+        self.evicted += len(expired)
+        return expired
+
+    def evict_idle(self):
+        with self.lock:
+            return self._evict_idle(time.monotonic())
+
+    def get(self, session_id):
+        if not session_id:
+            return None
+        with self.lock:
+            self._evict_idle(time.monotonic())
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.touch()
+            return session
+
+    def reserve(self, session_id=None):
+        with self.lock:
+            self._evict_idle(time.monotonic())
+            if session_id not in self.sessions:
+                session_id = uuid.uuid4().hex
+            active = len(self.sessions) + len(self.reserved)
+            if session_id in self.sessions:
+                active -= 1
+            if active >= self.max_sessions:
+                self.rejected += 1
+                raise SessionLimitError(
+                    f"Osiągnięto limit {self.max_sessions} równoczesnych symulacji"
+                )
+            self.reserved.add(session_id)
+        return session_id
+
+    def release(self, session_id):
+        with self.lock:
+            self.reserved.discard(session_id)
+
+    def create(self, session_id, model, scenario_id=None, tick_rate=None):
+        session = SimulationSession(session_id, model, scenario_id)
+        if tick_rate is not None:
+            session.publish(build_snapshot(model, True))
+            session.ticker = TickLoop(session, tick_rate)
+        with self.lock:
+            self.reserved.discard(session_id)
+            self._evict_idle(time.monotonic())
+            others = {
+                sid: s for sid, s in self.sessions.items() if sid != session_id
+            }
+            if len(others) >= self.max_sessions:
+                self.rejected += 1
+                raise SessionLimitError(
+                    f"Osiągnięto limit {self.max_sessions} równoczesnych symulacji"
+                )
+            if self.max_memory_bytes is not None:
+                used = sum(s.memory_bytes for s in others.values())
+                if used + session.memory_bytes > self.max_memory_bytes:
+                    self.rejected += 1
+                    raise SessionLimitError("Przekroczono limit pamięci symulacji")
+            previous = self.sessions.get(session_id)
+            if previous is not None:
+                previous.close()
+            self.sessions[session_id] = session
+            self.created += 1
+        if session.ticker is not None:
+            session.ticker.start()
+        return session
+
+    def remove(self, session_id):
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+        return session
+
+    def update_memory(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            with session.lock:
+                session.update_memory()
+
+    def stats(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+        now = time.monotonic()
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "idle_timeout": self.idle_timeout,
+            "memory_bytes": sum(s.memory_bytes for s in sessions),
+            "max_memory_bytes": self.max_memory_bytes,
+            "created": self.created,
+            "evicted": self.evicted,
+            "rejected": self.rejected,
+            "per_session": [
+                {
+                    "scenario_id": s.scenario_id,
+                    "running": s.running,
+                    "steps": s.model.schedule.steps,
+                    "agents": s.model.schedule.get_agent_count(),
+                    "idle_seconds": round(s.idle_seconds(now), 1),
+                    "memory_bytes": s.memory_bytes,
+                    "ticker": s.ticker.stats() if s.ticker else None,
+                }
+                for s in sessions
+            ],
+        }
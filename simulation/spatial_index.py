@@ -0,0 +1,87 @@
+import math
+
+
+class FactionSpatialIndex:
+    def __init__(self, width, height, bucket_size=8):
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self.buckets_x = math.ceil(width / bucket_size)
+        self.buckets_y = math.ceil(height / bucket_size)
+        self.buckets = {}
+        self.queries = 0
+        self.candidates_checked = 0
+
+    def _bucket_grid(self, faction):
+        grid = self.buckets.get(faction)
+        if grid is None:
+            grid = [
+                [{} for _ in range(self.buckets_x)] for _ in range(self.buckets_y)
+            ]
+            self.buckets[faction] = grid
+        return grid
+
+    def add(self, agent, pos):
+        faction = getattr(agent, "faction", None)
+        if faction is None:
+            return
+        x, y = pos
+        bucket = self._bucket_grid(faction)[y // self.bucket_size][
+            x // self.bucket_size
+        ]
+        bucket[agent.unique_id] = agent
+
+    def remove(self, agent, pos):
+        faction = getattr(agent, "faction", None)
+        if faction is None:
+            return
+        x, y = pos
+        bucket = self._bucket_grid(faction)[y // self.bucket_size][
+            x // self.bucket_size
+        ]
+        bucket.pop(agent.unique_id, None)
+
+    def nearest_enemy(self, pos, faction, radius):
+        self.queries += 1
+        x, y = pos
+        size = self.bucket_size
+        bx, by = x // size, y // size
+        max_ring = radius // size + 1
+        best = None
+        best_d = radius + 1
+        checked = 0
+
+        enemy_grids = [g for f, g in self.buckets.items() if f != faction]
+        for ring in range(max_ring + 1):
+            if best is not None and best_d <= (ring - 1) * size:
+                break
+            for cy in range(by - ring, by + ring + 1):
+                if cy < 0 or cy >= self.buckets_y:
+                    continue
+                on_edge_row = cy == by - ring or cy == by + ring
+                step = 1 if on_edge_row else 2 * ring
+                for cx in range(bx - ring, bx + ring + 1, step or 1):
+                    if cx < 0 or cx >= self.buckets_x:
+                        continue
+                    for grid in enemy_grids:
+                        for agent in grid[cy][cx].values():
+                            checked += 1
+                            if agent.hp <= 0:
+                                continue
+                            ax, ay = agent.pos
+                            d = max(abs(ax - x), abs(ay - y))
+                            if d < best_d:
+                                best = agent
+                                best_d = d
+
+        self.candidates_checked += checked
+        return best
+
+    def stats(self):
+        return {
+            "queries": self.queries,
+            "candidates_checked": self.candidates_checked,
+            "avg_candidates": (
+                self.candidates_checked / self.queries if self.queries else 0.0
+            ),
+        }
@@ -0,0 +1,300 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from statistics import NormalDist
+
+import numpy as np
+
+from .batch import MAP_PATH, run_battle
+from .outcome_cache import DEFAULT_CACHE_PATH, OutcomeCache, params_hash
+from .scenarios import get_scenario
+
+
+WINNER_CODES = {None: 0, "Armia Koronna": 1, "Kozacy/Tatarzy": 2, "Remis": 3}
+
+
+def grid_design(parameters):
+    names = list(parameters)
+    return names, [list(values) for values in itertools.product(*parameters.values())]
+
+
+def latin_hypercube_design(parameters, samples, seed=0):
+    rng = np.random.default_rng(seed)
+    names = list(parameters)
+    columns = []
+    for name in names:
+        low, high = parameters[name]
+        strata = (rng.permutation(samples) + rng.random(samples)) / samples
+        values = low + strata * (high - low)
+        if isinstance(low, int) and isinstance(high, int):
+            values = np.rint(values).astype(int)
+        columns.append(values.tolist())
+    return names, [list(point) for point in zip(*columns)]
+
+
+def apply_point(scenario_id, names, values):
+    units_config = get_scenario(scenario_id)["units"]
+    unit_overrides = {}
+    for name, value in zip(names, values):
+        kind, _, rest = name.partition(".")
+        if kind == "units_config":
+            units_config[rest] = int(value)
+        elif kind == "unit_params":
+            unit, _, field = rest.rpartition(".")
+            unit_overrides.setdefault(unit, {})[field] = value
+        else:
+            raise ValueError(f"Nieznany parametr: {name}")
+    return units_config, unit_overrides
+
+
+def wilson_interval(wins, runs, confidence=0.95):
+    if runs == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = wins / runs
+    denom = 1 + z * z / runs
+    center = (p + z * z / (2 * runs)) / denom
+    half = z * math.sqrt(p * (1 - p) / runs + z * z / (4 * runs * runs)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class DesignPoint:
+    def __init__(self, index, values, units_config, unit_overrides):
+        self.index = index
+        self.values = values
+        self.units_config = units_config
+        self.unit_overrides = unit_overrides
+        self.submitted = 0
+        self.in_flight = 0
+        self.results = []
+        self.stopped = False
+        self.params = None
+
+    def wins(self, faction):
+        return sum(1 for r in self.results if r["winner"] == faction)
+
+
+class SweepRunner:
+    def __init__(
+        self,
+        scenario_id,
+        names,
+        points,
+        weather="clear",
+        faction="Armia Koronna",
+        min_runs=20,
+        max_runs=500,
+        batch_size=10,
+        ci_half_width=0.05,
+        confidence=0.95,
+        first_seed=0,
+        max_steps=3000,
+        map_path=MAP_PATH,
+        workers=None,
+        cache=None,
+    ):
+        self.scenario_id = scenario_id
+        self.names = names
+        self.weather = weather
+        self.faction = faction
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.batch_size = batch_size
+        self.ci_half_width = ci_half_width
+        self.confidence = confidence
+        self.first_seed = first_seed
+        self.max_steps = max_steps
+        self.map_path = map_path
+        self.workers = workers or os.cpu_count()
+        self.points = [
+            DesignPoint(i, values, *apply_point(scenario_id, names, values))
+            for i, values in enumerate(points)
+        ]
+        self.cache = cache
+        if cache:
+            for point in self.points:
+                point.params = params_hash(
+                    point.units_config, point.unit_overrides, max_steps, map_path
+                )
+
+    def interval(self, point):
+        return wilson_interval(
+            point.wins(self.faction), len(point.results), self.confidence
+        )
+
+    def is_settled(self, point):
+        runs = len(point.results)
+        if runs >= self.max_runs:
+            return True
+        if runs < self.min_runs:
+            return False
+        low, high = self.interval(point)
+        return (high - low) / 2 <= self.ci_half_width
+
+    def _submit(self, executor, point, pending):
+        count = min(self.batch_size, self.max_runs - point.submitted)
+        for _ in range(count):
+            seed = self.first_seed + point.submitted
+            point.submitted += 1
+            if self.cache:
+                result = self.cache.get(
+                    self.scenario_id, self.weather, seed, point.params
+                )
+                if result is not None:
+                    point.results.append(result)
+                    continue
+            future = executor.submit(
+                run_battle,
+                self.scenario_id,
+                self.weather,
+                seed,
+                self.max_steps,
+                self.map_path,
+                point.units_config,
+                point.unit_overrides,
+            )
+            pending[future] = point
+            point.in_flight += 1
+
+    def _batch_done(self, point, queue, on_point_done):
+        if self.is_settled(point):
+            point.stopped = True
+            if on_point_done:
+                on_point_done(point)
+        else:
+            queue.append(point)
+
+    def run(self, on_point_done=None):
+        queue = list(self.points)
+        pending = {}
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while queue or pending:
+                while queue and len(pending) < self.workers * 2:
+                    point = queue.pop(0)
+                    self._submit(executor, point, pending)
+                    if not point.in_flight:
+                        self._batch_done(point, queue, on_point_done)
+                if not pending:
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    point = pending.pop(future)
+                    result = future.result()
+                    point.results.append(result)
+                    point.in_flight -= 1
+                    if self.cache:
+                        self.cache.put(
+                            self.scenario_id,
+                            self.weather,
+                            result["seed"],
+                            point.params,
+                            result,
+                        )
+                    if not point.in_flight:
+                        self._batch_done(point, queue, on_point_done)
+        return self.points
+
+    def columns(self):
+        runs = [(p, r) for p in self.points for r in p.results]
+        intervals = [self.interval(p) for p in self.points]
+        columns = {
+            "parameters": np.array(self.names),
+            "point": np.arange(len(self.points)),
+            "runs": np.array([len(p.results) for p in self.points]),
+            "wins": np.array([p.wins(self.faction) for p in self.points]),
+            "ci_low": np.array([low for low, _ in intervals]),
+            "ci_high": np.array([high for _, high in intervals]),
+            "mean_steps": np.array(
+                [np.mean([r["steps"] for r in p.results]) for p in self.points]
+            ),
+            "run_point": np.array([p.index for p, _ in runs], dtype=np.int32),
+            "run_seed": np.array([r["seed"] for _, r in runs], dtype=np.int64),
+            "run_winner": np.array(
+                [WINNER_CODES[r["winner"]] for _, r in runs], dtype=np.int8
+            ),
+            "run_steps": np.array([r["steps"] for _, r in runs], dtype=np.int32),
+            "run_crown": np.array([r["crown_count"] for _, r in runs], dtype=np.int32),
+            "run_cossack": np.array(
+                [r["cossack_count"] for _, r in runs], dtype=np.int32
+            ),
+            "run_wall_time": np.array([r["wall_time"] for _, r in runs]),
+        }
+        columns["win_rate"] = columns["wins"] / np.maximum(1, columns["runs"])
+        for i, name in enumerate(self.names):
+            columns[f"param:{name}"] = np.array([p.values[i] for p in self.points])
+        return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Przegląd parametrów metodą Monte Carlo z adaptacyjnym "
+        "zatrzymywaniem (przedział Wilsona)."
+    )
+    parser.add_argument("spec", help="Plik JSON z opisem przeglądu")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument(
+        "--output", help="Plik .npz (domyślnie sweep_<scenariusz>.npz)"
+    )
+    args = parser.parse_args()
+
+    with open(args.spec, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+
+    scenario_id = spec["scenario"]
+    if spec.get("design", "grid") == "lhs":
+        names, points = latin_hypercube_design(
+            spec["parameters"], spec["samples"], spec.get("design_seed", 0)
+        )
+    else:
+        names, points = grid_design(spec["parameters"])
+
+    runner = SweepRunner(
+        scenario_id,
+        names,
+        points,
+        weather=spec.get("weather", "clear"),
+        faction=spec.get("faction", "Armia Koronna"),
+        min_runs=spec.get("min_runs", 20),
+        max_runs=spec.get("max_runs", 500),
+        batch_size=spec.get("batch_size", 10),
+        ci_half_width=spec.get("ci_half_width", 0.05),
+        confidence=spec.get("confidence", 0.95),
+        first_seed=spec.get("first_seed", 0),
+        max_steps=spec.get("max_steps", 3000),
+        workers=args.workers,
+        cache=None if args.no_cache else OutcomeCache(args.cache),
+    )
+    print(
+        f"Przegląd {scenario_id}: {len(points)} punktów, "
+        f"{runner.workers} procesów"
+    )
+
+    def report(point):
+        low, high = runner.interval(point)
+        values = ", ".join(f"{n}={v}" for n, v in zip(names, point.values))
+        print(
+            f"  [{point.index}] {values}: {point.wins(runner.faction)}/"
+            f"{len(point.results)} ({low:.2f}-{high:.2f})"
+        )
+
+    started = time.perf_counter()
+    runner.run(on_point_done=report)
+    total_runs = sum(len(p.results) for p in runner.points)
+
+    output = args.output or f"sweep_{scenario_id}.npz"
+    np.savez_compressed(output, **runner.columns())
+    print(
+        f"Zakończono w {time.perf_counter() - started:.1f} s, "
+        f"{total_runs} bitew -> {output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import json
+import threading
+import time
+from collections import namedtuple
+
+
+Snapshot = namedtuple("Snapshot", ["step", "finished", "body"])
+
+MIN_TICK_RATE = 0.5
+MAX_TICK_RATE = 60.0
+
+
+def clamp_tick_rate(tick_rate):
+    if not tick_rate:
+        return 0.0
+    return min(MAX_TICK_RATE, max(MIN_TICK_RATE, tick_rate))
+
+
+def build_snapshot(model, running):
+    agents_data = []
+    for agent in model.schedule.agents:
+        if agent.hp <= 0:
+            continue
+
+        pos = agent.get_pos_tuple()
+        agents_data.append(
+            {
+                "id": agent.unique_id,
+                "faction": agent.faction,
+                "unit_type": agent.unit_type,
+                "x": pos[0],
+                "y": pos[1],
+                "hp": agent.hp,
+                "max_hp": agent.max_hp,
+                "morale": agent.morale,
+                "max_morale": agent.max_morale,
+                "state": agent.state,
+                "sprite_path": agent.unit.sprite_path,
+            }
+        )
+
+    counts = model.get_faction_counts()
+    stats = {
+        "crown_count": counts["crown_count"],
+        "cossack_count": counts["cossack_count"],
+        "total_agents": counts["crown_count"] + counts["cossack_count"],
+        "steps": model.schedule.steps,
+    }
+    battle_status = model.get_battle_status()
+
+    payload = {
+        "agents": agents_data,
+        "stats": stats,
+        "battle_status": battle_status,
+        "running": running,
+        "map_width": model.grid.width,
+        "map_height": model.grid.height,
+        "healing_zones": [{"x": x, "y": y} for x, y in model.healing_centers],
+    }
+    return Snapshot(
+        model.schedule.steps,
+        battle_status["status"] == "finished",
+        json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+    )
+
+
+class TickLoop:
+    def __init__(self, session, tick_rate=5.0):
+        self.session = session
+        tick_rate = clamp_tick_rate(tick_rate)
+        self.interval = 1.0 / tick_rate if tick_rate else 0.0
+        self.stop_event = threading.Event()
+        self.resume_event = threading.Event()
+        self.resume_event.set()
+        self.thread = threading.Thread(
+            target=self.run, name=f"tick-{session.session_id[:8]}", daemon=True
+        )
+
+        self.ticks = 0
+        self.tick_seconds = 0.0
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.resume_event.set()
+
+    def pause(self):
+        self.resume_event.clear()
+
+    def resume(self):
+        self.resume_event.set()
+
+    @property
+    def paused(self):
+        return not self.resume_event.is_set()
+
+    def tick(self):
+        session = self.session
+        with session.lock:
+            if not session.running:
+                return False
+            session.model.step()
+            snapshot = build_snapshot(session.model, True)
+            if snapshot.finished:
+                session.running = False
+                snapshot = build_snapshot(session.model, False)
+        session.publish(snapshot)
+        return session.running
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self.stop_event.is_set():
+            if not self.resume_event.is_set():
+                self.resume_event.wait()
+                next_tick = time.perf_counter()
+                continue
+
+            started = time.perf_counter()
+            running = self.tick()
+            self.ticks += 1
+            self.tick_seconds += time.perf_counter() - started
+            if not running:
+                break
+
+            next_tick += self.interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            else:
+                # Unthrottled or behind schedule: let request threads run.
+                time.sleep(0)
+                next_tick = time.perf_counter()
+
+    def stats(self):
+        return {
+            "tick_rate": 1.0 / self.interval if self.interval else None,
+            "ticks": self.ticks,
+            "mean_tick_ms": 1000 * self.tick_seconds / self.ticks if self.ticks else 0,
+            "paused": self.paused,
+        }
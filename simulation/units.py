@@ -0,0 +1,303 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+
+CROWN = "Armia Koronna"
+COSSACKS = "Kozacy/Tatarzy"
+WEATHERS = ("clear", "rain", "fog")
+
+UnitType = namedtuple(
+    "UnitType",
+    [
+        "name",
+        "faction",
+        "hp",
+        "morale",
+        "discipline",
+        "melee_damage",
+        "ranged_damage",
+        "range",
+        "ammo",
+        "defense",
+        "speed",
+        "rate_of_fire",
+        "description",
+        "sprite_path",
+        "is_cavalry",
+        "is_artillery",
+        "charge_multiplier",
+    ],
+)
+
+_COSSACK_UNITS = (
+    "Jazda Tatarska",
+    "Piechota Kozacka",
+    "Czern",
+    "Jazda Kozacka",
+    "Artyleria Kozacka",
+)
+_CAVALRY_UNITS = (
+    "Husaria",
+    "Pancerni",
+    "Rajtaria",
+    "Jazda Tatarska",
+    "Jazda Kozacka",
+)
+_CHARGING_UNITS = ("Husaria", "Jazda Tatarska", "Jazda Kozacka")
+_ARTILLERY_UNITS = ("Artyleria Koronna", "Artyleria Kozacka")
+
+_UNIT_STATS = {
+    "Husaria": {
+        "hp": 150,
+        "morale": 140,
+        "discipline": 95,
+        "melee_damage": 100,
+        "ranged_damage": 0,
+        "range": 1,
+        "ammo": 0,
+        "defense": 8,
+        "speed": 6,
+        "rate_of_fire": 1.0,
+        "description": "Elitarna ciężka jazda przełamująca.",
+        "sprite_path": "assets/sprites/crown_cavalry.png",
+    },
+    "Pancerni": {
+        "hp": 120,
+        "morale": 110,
+        "discipline": 85,
+        "melee_damage": 70,
+        "ranged_damage": 0,
+        "range": 1,
+        "ammo": 0,
+        "defense": 5,
+        "speed": 7,
+        "rate_of_fire": 1.0,
+        "description": "Jazda średniozbrojna, uniwersalna.",
+        "sprite_path": "assets/sprites/pancerni.png",
+    },
+    "Rajtaria": {
+        "hp": 110,
+        "morale": 100,
+        "discipline": 90,
+        "melee_damage": 40,
+        "ranged_damage": 30,
+        "range": 3,
+        "ammo": 12,
+        "defense": 6,
+        "speed": 6,
+        "rate_of_fire": 0.8,
+        "description": "Ciężka jazda z bronią palną.",
+        "sprite_path": "assets/sprites/rajtaria.png",
+    },
+    "Dragonia": {
+        "hp": 100,
+        "morale": 95,
+        "discipline": 85,
+        "melee_damage": 30,
+        "ranged_damage": 25,
+        "range": 4,
+        "ammo": 15,
+        "defense": 4,
+        "speed": 5,
+        "rate_of_fire": 1.2,
+        "description": "Mobilna piechota konna.",
+        "sprite_path": "assets/sprites/crown_dragoon.png",
+    },
+    "Piechota Niemiecka": {
+        "hp": 110,
+        "morale": 100,
+        "discipline": 95,
+        "melee_damage": 25,
+        "ranged_damage": 35,
+        "range": 5,
+        "ammo": 20,
+        "defense": 6,
+        "speed": 3,
+        "rate_of_fire": 1.3,
+        "description": "Wysoka dyscyplina, silny ogień.",
+        "sprite_path": "assets/sprites/crown_infantry.png",
+    },
+    "Pospolite Ruszenie": {
+        "hp": 90,
+        "morale": 50,
+        "discipline": 20,
+        "melee_damage": 20,
+        "ranged_damage": 10,
+        "range": 2,
+        "ammo": 5,
+        "defense": 2,
+        "speed": 6,
+        "rate_of_fire": 0.8,
+        "description": "Niska dyscyplina, podatność na panikę.",
+        "sprite_path": "assets/sprites/crown_levy.png",
+    },
+    "Czeladz Obozowa": {
+        "hp": 60,
+        "morale": 90,
+        "discipline": 40,
+        "melee_damage": 25,
+        "ranged_damage": 0,
+        "range": 1,
+        "ammo": 0,
+        "defense": 0,
+        "speed": 5,
+        "rate_of_fire": 1.0,
+        "description": "Słabo uzbrojona, zdeterminowana.",
+        "sprite_path": "assets/sprites/crown_levy.png",
+    },
+    "Artyleria Koronna": {
+        "hp": 50,
+        "morale": 90,
+        "discipline": 90,
+        "melee_damage": 5,
+        "ranged_damage": 150,
+        "range": 15,
+        "ammo": 30,
+        "defense": 0,
+        "speed": 1,
+        "rate_of_fire": 0.25,
+        "description": "Potężna siła ognia, bardzo wolna.",
+        "sprite_path": "assets/sprites/armata.png",
+    },
+    "Jazda Tatarska": {
+        "hp": 85,
+        "morale": 80,
+        "discipline": 70,
+        "melee_damage": 30,
+        "ranged_damage": 15,
+        "range": 4,
+        "ammo": 40,
+        "defense": 1,
+        "speed": 9,
+        "rate_of_fire": 1.8,
+        "description": "Szybcy łucznicy.",
+        "sprite_path": "assets/sprites/cossack_cavalry.png",
+    },
+    "Piechota Kozacka": {
+        "hp": 115,
+        "morale": 110,
+        "discipline": 80,
+        "melee_damage": 35,
+        "ranged_damage": 35,
+        "range": 5,
+        "ammo": 25,
+        "defense": 3,
+        "speed": 4,
+        "rate_of_fire": 1.4,
+        "description": "Znakomici strzelcy.",
+        "sprite_path": "assets/sprites/cossack_infantry.png",
+    },
+    "Czern": {
+        "hp": 70,
+        "morale": 60,
+        "discipline": 40,
+        "melee_damage": 20,
+        "ranged_damage": 0,
+        "range": 1,
+        "ammo": 0,
+        "defense": 0,
+        "speed": 5,
+        "rate_of_fire": 1.0,
+        "description": "Liczni, słabo uzbrojeni.",
+        "sprite_path": "assets/sprites/cossack_infantry.png",
+    },
+    "Jazda Kozacka": {
+        "hp": 100,
+        "morale": 90,
+        "discipline": 75,
+        "melee_damage": 50,
+        "ranged_damage": 0,
+        "range": 2,
+        "ammo": 0,
+        "defense": 3,
+        "speed": 7,
+        "rate_of_fire": 1.0,
+        "description": "Jazda średnia.",
+        "sprite_path": "assets/sprites/cossack_cavalry.png",
+    },
+    "Artyleria Kozacka": {
+        "hp": 40,
+        "morale": 80,
+        "discipline": 80,
+        "melee_damage": 5,
+        "ranged_damage": 130,
+        "range": 14,
+        "ammo": 25,
+        "defense": 0,
+        "speed": 1,
+        "rate_of_fire": 0.25,
+        "description": "Ostrzał obozu.",
+        "sprite_path": "assets/sprites/cossack_infantry.png",
+    },
+}
+
+
+def _base_unit(name, stats):
+    return UnitType(
+        name=name,
+        faction=COSSACKS if name in _COSSACK_UNITS else CROWN,
+        hp=stats["hp"],
+        morale=stats["morale"],
+        discipline=stats.get("discipline", 50),
+        melee_damage=stats.get("melee_damage", 10),
+        ranged_damage=stats.get("ranged_damage", 0),
+        range=stats.get("range", 1),
+        ammo=stats.get("ammo", 0),
+        defense=stats.get("defense", 0),
+        speed=stats.get("speed", 1),
+        rate_of_fire=stats.get("rate_of_fire", 1.0),
+        description=stats["description"],
+        sprite_path=stats["sprite_path"],
+        is_cavalry=name in _CAVALRY_UNITS,
+        is_artillery=name in _ARTILLERY_UNITS,
+        charge_multiplier=1.5 if name in _CHARGING_UNITS else 1.0,
+    )
+
+
+def _rain_variant(unit):
+    changes = {"rate_of_fire": max(0.1, unit.rate_of_fire * 0.8)}
+    if unit.ranged_damage > 0:
+        changes["ranged_damage"] = int(unit.ranged_damage * 0.3)
+        changes["description"] = unit.description + " (Mokry proch/cięciwy!)"
+    if unit.is_cavalry:
+        changes["speed"] = max(2, unit.speed - 3)
+    if unit.is_artillery:
+        changes["speed"] = 1
+    return unit._replace(**changes)
+
+
+def _weather_variant(unit, weather):
+    if weather == "rain":
+        return _rain_variant(unit)
+    return unit
+
+
+def _build_registry():
+    base = {name: _base_unit(name, stats) for name, stats in _UNIT_STATS.items()}
+    return MappingProxyType(
+        {
+            weather: MappingProxyType(
+                {name: _weather_variant(unit, weather) for name, unit in base.items()}
+            )
+            for weather in WEATHERS
+        }
+    )
+
+
+UNIT_TYPES = _build_registry()
+
+
+def unit_types(weather="clear", overrides=None):
+    if not overrides:
+        return UNIT_TYPES.get(weather, UNIT_TYPES["clear"])
+
+    units = dict(UNIT_TYPES["clear"])
+    for name, changes in overrides.items():
+        units[name] = units[name]._replace(**changes)
+    return MappingProxyType(
+        {name: _weather_variant(unit, weather) for name, unit in units.items()}
+    )
+
+
+def unit_type(name, weather="clear"):
+    return unit_types(weather)[name]
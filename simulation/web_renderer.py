@@ -1,12 +1,18 @@
 from PIL import Image, ImageDraw
+import numpy as np
 import os
+from .map_bundle import GID_MASK
 
 
 class WebRenderer:
     def __init__(self, model, tile_size=16, scale=2):
         self.model = model
+        self.map_bundle = getattr(model, "map_bundle", None)
         map_data = getattr(model, "map_data", None)
-        if map_data is not None:
+        if self.map_bundle is not None:
+            self.tile_width = self.map_bundle.tile_width
+            self.tile_height = self.map_bundle.tile_height
+        elif map_data is not None:
             self.tile_width = getattr(map_data, "tilewidth", tile_size)
             self.tile_height = getattr(map_data, "tileheight", tile_size)
         else:
@@ -21,6 +27,7 @@ class WebRenderer:
 
         self.tileset_image = None
         self.tileset_cache = {}
+        self.terrain_gids = None
         self._load_tileset()
 
     def load_sprite(self, sprite_path):
@@ -46,9 +53,29 @@ class WebRenderer:
         sprite = Image.new("RGBA", (w, h), (100, 100, 100, 255))
         return sprite
 
+    def _load_bundle_tilesets(self):
+        map_dir = os.path.dirname(self.map_bundle.path)
+        for tileset in self.map_bundle.tilesets:
+            tileset_path = os.path.join(map_dir, tileset["image"])
+            image = None
+            if os.path.exists(tileset_path):
+                try:
+                    image = Image.open(tileset_path).convert("RGBA")
+                except Exception as e:
+                    print(f"⚠️ Nie można załadować obrazu tilesetu {tileset_path}: {e}")
+            else:
+                print(f"⚠️ Plik tilesetu nie istnieje: {tileset_path}")
+            self.tilesets_info.append(
+                dict(tileset, image_path=tileset_path, image=image)
+            )
+        self.tilesets_info.sort(key=lambda t: t["firstgid"])
+
     def _load_tileset(self):
         try:
             self.tilesets_info = []
+            if self.map_bundle is not None:
+                self._load_bundle_tilesets()
+                return
             map_data = getattr(self.model, "map_data", None)
             if map_data is None:
                 print("⚠️  Brak map_data w modelu")
@@ -184,35 +211,6 @@ class WebRenderer:
 
             traceback.print_exc()
 
-        try:
-            tmx_get = getattr(self.model.map_data, "get_tile_image_by_gid", None)
-            if callable(tmx_get):
-                alt = tmx_get(gid)
-                if alt is not None:
-                    if isinstance(alt, Image.Image):
-                        tile = alt.convert("RGBA")
-                    else:
-                        try:
-                            tile = Image.frombytes(
-                                "RGBA", alt.get_size(), alt.tobytes()
-                            )
-                        except Exception:
-                            tile = None
-
-                    if tile is not None:
-                        target_w = int(self.tile_width * self.scale)
-                        target_h = int(self.tile_height * self.scale)
-                        scaled_tile = tile.resize(
-                            (target_w, target_h), Image.Resampling.NEAREST
-                        )
-                        self.tileset_cache[gid] = scaled_tile
-                        return scaled_tile
-        except Exception as e:
-            print(f"⚠️ Fallback pytmx get_tile_image_by_gid failed for GID {gid}: {e}")
-            import traceback
-
-            traceback.print_exc()
-
         return None
 
     def render_frame(self):
@@ -226,9 +224,7 @@ class WebRenderer:
             x = int((pos[0] + 0.5) * self.tile_width * self.scale)
             y = int((self.model.height - pos[1] - 0.5) * self.tile_height * self.scale)
 
-            sprite = self.load_sprite(
-                agent.model.unit_params[agent.unit_type]["sprite_path"]
-            )
+            sprite = self.load_sprite(agent.unit.sprite_path)
             sprite_x = x - sprite.width // 2
             sprite_y = y - sprite.height // 2
 
@@ -241,91 +237,61 @@ class WebRenderer:
     def render_map_only(self):
         image = Image.new("RGB", (self.width, self.height), (50, 50, 50))
 
-        try:
-            layer = self.model.map_data.get_layer_by_name("Teren")
-            if not layer:
-                print("⚠️  Nie znaleziono warstwy 'Teren'")
-                return image
+        gids = self._terrain_gids()
+        if gids is None:
+            return image
+        return self._render_gids(image, gids)
+
+    def _terrain_gids(self):
+        if self.map_bundle is not None:
+            return self.map_bundle.gids
+        if self.terrain_gids is not None:
+            return self.terrain_gids
+
+        map_data = getattr(self.model, "map_data", None)
+        layer = map_data.get_layer_by_name("Teren") if map_data else None
+        if not layer:
+            print("⚠️  Nie znaleziono warstwy 'Teren'")
+            return None
 
-            for x in range(self.model.width):
-                for y in range(self.model.height):
-                    raw_gid = layer.data[y][x]
-                    gid = raw_gid & 0x1FFFFFFF
+        # pytmx renumbers GIDs internally; map them back to the TMX GIDs
+        # that tilesets_info and _get_tile_image are keyed by.
+        gidmap = getattr(map_data, "tiledgidmap", {})
+        self.terrain_gids = np.array(
+            [[gidmap.get(gid, 0) for gid in row] for row in layer.data],
+            dtype=np.uint32,
+        )
+        return self.terrain_gids
 
-                    tmx_get = getattr(
-                        self.model.map_data, "get_tile_image_by_gid", None
-                    )
-                    tile_img = None
-                    if callable(tmx_get):
-                        try:
-                            alt = tmx_get(raw_gid)
-                            if alt is not None:
-                                if isinstance(alt, Image.Image):
-                                    tile_img = alt.convert("RGBA")
-                                else:
-                                    try:
-                                        size = alt.get_size()
-                                        tile_img = Image.frombytes(
-                                            "RGBA", size, alt.tobytes()
-                                        )
-                                    except Exception:
-                                        tile_img = None
-                                if tile_img is not None:
-                                    target_w = int(self.tile_width * self.scale)
-                                    target_h = int(self.tile_height * self.scale)
-                                    tile_img = tile_img.resize(
-                                        (target_w, target_h), Image.Resampling.NEAREST
-                                    )
-                        except Exception:
-                            tile_img = None
+    def _render_gids(self, image, gids):
+        tile_w = int(self.tile_width * self.scale)
+        tile_h = int(self.tile_height * self.scale)
+        draw = ImageDraw.Draw(image)
 
-                    img_x = int(x * self.tile_width * self.scale)
-                    img_y = int(
-                        (self.model.height - y - 1) * self.tile_height * self.scale
+        for y in range(self.model.height):
+            img_y = int((self.model.height - y - 1) * tile_h)
+            for x in range(self.model.width):
+                img_x = int(x * tile_w)
+                tile_img = self._get_tile_image(int(gids[y, x]) & GID_MASK)
+                if tile_img:
+                    image.paste(tile_img, (img_x, img_y), tile_img)
+                else:
+                    draw.rectangle(
+                        [img_x, img_y, img_x + tile_w - 1, img_y + tile_h - 1],
+                        fill=self._fallback_color(x, y),
                     )
-
-                    if gid != 0 and tile_img is None:
-                        tile_img = self._get_tile_image(gid)
-
-                    if tile_img:
-                        image.paste(tile_img, (img_x, img_y), tile_img)
-                    else:
-                        cost = None
-                        try:
-                            cost = self.model.terrain_costs[y, x]
-                        except Exception:
-                            cost = None
-
-                        if cost is not None:
-                            if cost < 1.2:
-                                color = (100, 200, 100)
-                            elif cost < 1.5:
-                                color = (150, 150, 80)
-                            elif cost < 2.0:
-                                color = (120, 100, 70)
-                            else:
-                                color = (80, 80, 80)
-                        else:
-                            color = (50, 50, 50)
-
-                        draw_temp = ImageDraw.Draw(image)
-                        draw_temp.rectangle(
-                            [
-                                img_x,
-                                img_y,
-                                img_x + int(self.tile_width * self.scale) - 1,
-                                img_y + int(self.tile_height * self.scale) - 1,
-                            ],
-                            fill=color,
-                        )
-        except Exception as e:
-            print(f"Błąd podczas renderowania mapy: {e}")
-            import traceback
-
-            traceback.print_exc()
-
         return image
 
+    def _fallback_color(self, x, y):
+        cost = self.model.terrain_costs[y, x]
+        if cost < 1.2:
+            return (100, 200, 100)
+        if cost < 1.5:
+            return (150, 150, 80)
+        if cost < 2.0:
+            return (120, 100, 70)
+        return (80, 80, 80)
+
     def render_heatmap(self, heatmap_data):
         image = self.render_map_only()
         overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
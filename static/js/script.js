@@ -533,9 +533,19 @@ function showPage(pageName) {
 }
 
 
-function togglePause() {
+async function togglePause() {
     isPaused = !isPaused;
     const pauseBtn = document.getElementById('pauseBtn');
+
+    try {
+        await fetch('/api/pause-simulation', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ paused: isPaused })
+        });
+    } catch (error) {
+        console.error('Błąd wstrzymywania symulacji:', error);
+    }
     
     if (isPaused) {
         pauseBtn.textContent = '▶️ Wznów';